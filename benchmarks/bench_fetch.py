@@ -0,0 +1,197 @@
+"""Offline benchmark for the Daily Fingerpori fetch pipeline and image serving.
+
+Runs a local aiohttp server that imitates darkball's RSS feeds and comic
+images, then drives ComicCoordinator refreshes and FingerporiImage.async_image
+against it. Needs Home Assistant installed (as in a dev container), no network.
+
+    python benchmarks/bench_fetch.py --scenario all --feeds 15 --rounds 20
+
+Reports refresh latency percentiles, bytes transferred, image-serve
+throughput and peak RSS per scenario.
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "custom_components"))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from daily_fingerpori.archive import ComicArchive  # noqa: E402
+from daily_fingerpori.coordinator import ComicCoordinator  # noqa: E402
+from daily_fingerpori.fetch import async_get_single_flight  # noqa: E402
+from daily_fingerpori.image_entity import FingerporiImage  # noqa: E402
+
+SCENARIOS = ("unchanged", "new_comic", "slow", "failing")
+
+RSS_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>{strip}</title>
+{items}
+</channel></rss>"""
+ITEM_TEMPLATE = """<item><title>{strip} {n}</title><guid>{base}/{strip}/{n}</guid>
+<pubDate>Sat, 17 Oct 2026 00:{minute:02d}:00 +0000</pubDate>
+<description><![CDATA[<p><img src="{base}/images/{strip}-{n}.gif" /></p>]]></description></item>"""
+
+
+class FakeDarkball:
+    """State of the stand-in server: which comic is current and how to misbehave."""
+
+    def __init__(self, image_bytes: int, latency: float, items: int):
+        self.image_bytes = image_bytes
+        self.latency = latency
+        self.items = items
+        self.failing = False
+        self.generation = 0
+        self.bytes_sent = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.base = ""
+
+    def _etag(self, key: str) -> str:
+        return f'"{hashlib.sha1(f"{key}-{self.generation}".encode()).hexdigest()}"'
+
+    async def _delay_or_fail(self) -> None:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failing:
+            raise web.HTTPInternalServerError()
+
+    def _respond(self, request: web.Request, key: str, body: bytes, content_type: str) -> web.Response:
+        etag = self._etag(key)
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type=content_type, headers={"ETag": etag})
+
+    async def feed(self, request: web.Request) -> web.Response:
+        await self._delay_or_fail()
+        strip = request.match_info["strip"]
+        items = "\n".join(
+            ITEM_TEMPLATE.format(strip=strip, n=self.generation - i, minute=i % 60, base=self.base)
+            for i in range(self.items)
+        )
+        body = RSS_TEMPLATE.format(strip=strip, items=items).encode()
+        return self._respond(request, f"feed-{strip}", body, "application/rss+xml")
+
+    async def image(self, request: web.Request) -> web.Response:
+        await self._delay_or_fail()
+        name = request.match_info["name"]
+        # GIF header followed by filler unique to the comic, so every generation hashes differently
+        filler = hashlib.sha256(f"{name}-{self.generation}".encode()).digest()
+        body = b"GIF89a" + (filler * (self.image_bytes // len(filler) + 1))[: self.image_bytes]
+        return self._respond(request, f"image-{name}", body, "image/gif")
+
+
+def _percentiles(samples: list[float]) -> str:
+    if len(samples) < 2:
+        return f"p50={samples[0] * 1000:.1f}ms" if samples else "n/a"
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return f"p50={q[49] * 1000:.1f}ms p90={q[89] * 1000:.1f}ms p99={q[98] * 1000:.1f}ms max={max(samples) * 1000:.1f}ms"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_scenario(args: argparse.Namespace, scenario: str, config_dir: str) -> None:
+    server = FakeDarkball(args.image_kb * 1024, args.latency_ms / 1000 if scenario == "slow" else 0, args.items)
+    app = web.Application()
+    app.router.add_get("/images/{name}.gif", server.image)
+    app.router.add_get("/{strip}/", server.feed)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    server.base = f"http://127.0.0.1:{port}"
+
+    hass = HomeAssistant(config_dir)
+    os.makedirs(hass.config.path("www"), exist_ok=True)
+    # Rounds follow each other within the coalescing window; by default measure real fetches
+    flight = async_get_single_flight(hass)
+    flight.window = args.coalesce_window
+    archive = ComicArchive(
+        hass, hass.config.path("www/bench_archive"), hass.config.path(f"bench_{scenario}.db"), 10_000, 10**12
+    )
+    coordinators = []
+    for c in range(args.entries):
+        feeds = {
+            f"{server.base}/strip{f}/?feed=rss": hass.config.path(f"www/bench_{scenario}_{c}_{f}.gif")
+            for f in range(args.feeds)
+        }
+        coordinators.append(ComicCoordinator(hass, f"bench_{scenario}_{c}", feeds, timedelta(hours=3), archive))
+
+    # Warm-up round so every scenario starts with a comic on disk
+    await asyncio.gather(*(c.async_refresh() for c in coordinators))
+    server.bytes_sent = server.requests = server.not_modified = 0
+    server.failing = scenario == "failing"
+
+    latencies = []
+    for _ in range(args.rounds):
+        if scenario == "new_comic":
+            server.generation += 1
+
+        async def _timed(coordinator: ComicCoordinator) -> None:
+            start = time.perf_counter()
+            await coordinator.async_refresh()
+            latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(_timed(c) for c in coordinators))
+
+    # Image serving: every entity answers concurrent requests, as from many dashboards
+    entities = [
+        FingerporiImage(hass, c, path, None, "bench", url) for c in coordinators for url, path in c.feeds.items()
+    ]
+    serve_start = time.perf_counter()
+    for _ in range(args.serve_requests // max(1, len(entities))):
+        await asyncio.gather(*(e.async_image() for e in entities))
+    serve_elapsed = time.perf_counter() - serve_start
+    served = (args.serve_requests // max(1, len(entities))) * len(entities)
+
+    print(f"== {scenario}: {args.entries} entries x {args.feeds} feeds, {args.rounds} rounds")
+    print(f"   refresh latency  {_percentiles(latencies)}")
+    print(f"   transferred      {server.bytes_sent / 1024:.1f} KiB in {server.requests} requests ({server.not_modified} x 304)")
+    print(f"   coalesced        {flight.coalesced} feed fetches")
+    print(f"   image serving    {served / serve_elapsed:.0f} req/s over {served} requests")
+    print(f"   peak RSS         {_peak_rss_mb():.1f} MiB")
+
+    await hass.async_stop(force=True)
+    await runner.cleanup()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=(*SCENARIOS, "all"), default="all")
+    parser.add_argument("--entries", type=int, default=1, help="config entries refreshing concurrently")
+    parser.add_argument("--feeds", type=int, default=1, help="feeds per config entry")
+    parser.add_argument("--rounds", type=int, default=10, help="refresh cycles per scenario")
+    parser.add_argument("--items", type=int, default=20, help="items per fake feed")
+    parser.add_argument("--image-kb", type=int, default=150, help="size of each fake comic")
+    parser.add_argument("--latency-ms", type=int, default=300, help="per-request latency in the slow scenario")
+    parser.add_argument("--coalesce-window", type=float, default=0, help="seconds a fetch result is reused")
+    parser.add_argument("--serve-requests", type=int, default=2000, help="async_image calls after refreshing")
+    args = parser.parse_args()
+    # The failing scenario would otherwise flood the output with retry warnings
+    logging.basicConfig(level=logging.ERROR)
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    with tempfile.TemporaryDirectory() as config_dir:
+        for scenario in scenarios:
+            await run_scenario(args, scenario, config_dir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,215 @@
+"""Content-addressed on-disk archive of downloaded comics with a SQLite index."""
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
+
+from .const import DOMAIN, DATA_ARCHIVE, ARCHIVE_DIR, ARCHIVE_DB
+
+_LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS comics (
+    feed TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    pub_date TEXT,
+    pub_ts REAL NOT NULL,
+    sha256 TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_ts REAL NOT NULL,
+    PRIMARY KEY (feed, item_key)
+);
+CREATE INDEX IF NOT EXISTS comics_feed_pub ON comics (feed, pub_ts DESC);
+CREATE INDEX IF NOT EXISTS comics_accessed ON comics (accessed_ts);
+CREATE INDEX IF NOT EXISTS comics_sha256 ON comics (sha256);
+"""
+
+
+@dataclass
+class ArchivedComic:
+    """One indexed comic; the file lives at <archive dir>/<filename>."""
+
+    feed: str
+    item_key: str
+    pub_date: str | None
+    pub_ts: float
+    sha256: str
+    filename: str
+    size: int
+
+
+def _pub_timestamp(pub_date: str | None) -> float:
+    if pub_date:
+        try:
+            return parsedate_to_datetime(pub_date).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return time.time()
+
+
+class ComicArchive:
+    """Stores every downloaded comic once, keyed by content hash.
+
+    The index is keyed by feed and item GUID (falling back to the content hash)
+    and ordered by pubDate, so browsing never scans the directory. Once the
+    archive holds more than max_count comics or max_bytes of files, the least
+    recently accessed entries are evicted. A comic counts as accessed when it
+    was published, so strips backfilled newest first are evicted oldest first.
+    All methods without the async_ prefix block and must run on the executor.
+    """
+
+    def __init__(self, hass: HomeAssistant, directory: str, db_path: str, max_count: int, max_bytes: int):
+        self.hass = hass
+        self.directory = directory
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self._db_path = db_path
+        self._conn: sqlite3.Connection | None = None
+        # Executor jobs run on different threads; serialize access to the connection
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add(self, feed: str, guid: str | None, pub_date: str | None, source_path: str, sha256: str, ext: str) -> ArchivedComic | None:
+        """Copy a comic file into the archive (once per content hash) and index it.
+
+        Returns None when the comic is older than everything else in a full
+        archive, so it was evicted again right away.
+        """
+        filename = f"{sha256}{ext}"
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            conn = self._db()
+            if not os.path.exists(path):
+                tmp_path = f"{path}.tmp"
+                shutil.copyfile(source_path, tmp_path)
+                os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            comic = ArchivedComic(feed, guid or sha256, pub_date, _pub_timestamp(pub_date), sha256, filename, size)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO comics VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (comic.feed, comic.item_key, comic.pub_date, comic.pub_ts, comic.sha256,
+                     comic.filename, comic.size, min(time.time(), comic.pub_ts)),
+                )
+            self._evict(conn)
+            kept = conn.execute("SELECT 1 FROM comics WHERE sha256 = ?", (sha256,)).fetchone()
+        return comic if kept else None
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently accessed comics until both limits are met."""
+        while True:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM comics)"
+            ).fetchone()
+            if count <= self.max_count and total <= self.max_bytes:
+                return
+            row = conn.execute(
+                "SELECT sha256, filename FROM comics ORDER BY accessed_ts, pub_ts LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return
+            sha256, filename = row
+            # Files are shared by content, so evict every index entry pointing at it
+            with conn:
+                conn.execute("DELETE FROM comics WHERE sha256 = ?", (sha256,))
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+            _LOGGER.debug("Evicted archived comic %s", filename)
+
+    def feeds(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db().execute("SELECT DISTINCT feed FROM comics ORDER BY feed")]
+
+    def recent(self, feed: str, limit: int) -> list[ArchivedComic]:
+        """Return the newest comics of a feed by pubDate."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT feed, item_key, pub_date, pub_ts, sha256, filename, size FROM comics "
+                "WHERE feed = ? ORDER BY pub_ts DESC LIMIT ?",
+                (feed, limit),
+            ).fetchall()
+        return [ArchivedComic(*row) for row in rows]
+
+    def contains(self, feed: str, item_key: str) -> bool:
+        """Return whether an item of a feed is already archived."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT 1 FROM comics WHERE feed = ? AND item_key = ?", (feed, item_key)
+            ).fetchone()
+        return row is not None
+
+    def lookup(self, sha256: str) -> ArchivedComic | None:
+        """Return an archived comic by content hash and mark it as recently used."""
+        with self._lock:
+            conn = self._db()
+            row = conn.execute(
+                "SELECT feed, item_key, pub_date, pub_ts, sha256, filename, size FROM comics "
+                "WHERE sha256 = ? LIMIT 1",
+                (sha256,),
+            ).fetchone()
+            if row is None:
+                return None
+            with conn:
+                conn.execute("UPDATE comics SET accessed_ts = ? WHERE sha256 = ?", (time.time(), sha256))
+        return ArchivedComic(*row)
+
+    async def async_close(self) -> None:
+        await self.hass.async_add_executor_job(self.close)
+
+    async def async_add(self, feed: str, guid: str | None, pub_date: str | None, source_path: str, sha256: str, ext: str) -> ArchivedComic | None:
+        return await self.hass.async_add_executor_job(self.add, feed, guid, pub_date, source_path, sha256, ext)
+
+    async def async_feeds(self) -> list[str]:
+        return await self.hass.async_add_executor_job(self.feeds)
+
+    async def async_recent(self, feed: str, limit: int) -> list[ArchivedComic]:
+        return await self.hass.async_add_executor_job(self.recent, feed, limit)
+
+    async def async_contains(self, feed: str, item_key: str) -> bool:
+        return await self.hass.async_add_executor_job(self.contains, feed, item_key)
+
+    async def async_lookup(self, sha256: str) -> ArchivedComic | None:
+        return await self.hass.async_add_executor_job(self.lookup, sha256)
+
+
+def async_get_archive(hass: HomeAssistant, max_count: int, max_bytes: int) -> ComicArchive:
+    """Return the archive shared by all config entries, applying the given limits."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    archive = domain_data.get(DATA_ARCHIVE)
+    if archive is None:
+        archive = ComicArchive(
+            hass, hass.config.path(f"www/{ARCHIVE_DIR}"), hass.config.path(ARCHIVE_DB), max_count, max_bytes
+        )
+        domain_data[DATA_ARCHIVE] = archive
+
+        async def _async_close(_event: Event) -> None:
+            await archive.async_close()
+
+        # The archive outlives config entries; release its SQLite connection on shutdown
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close)
+    else:
+        archive.max_count = max_count
+        archive.max_bytes = max_bytes
+    return archive
@@ -0,0 +1,288 @@
+"""Backfill service: walk older feed pages and archive every strip in a date range."""
+import asyncio
+import logging
+import socket
+from dataclasses import asdict, dataclass
+from datetime import date
+import xml.etree.ElementTree as ET
+
+import aiohttp
+import voluptuous as vol
+from yarl import URL
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .archive import ComicArchive
+from .breaker import HostCoolingDown, HostFailed, async_get_breaker, is_item_error, retry_after
+from .const import DOMAIN, SERVICE_BACKFILL
+from .fetch import REQUEST_TIMEOUT, FeedItem, ImageRejected, async_archive_image, async_get_session, async_read_items, feed_slug
+from .schedule import parse_pub_date
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Images downloaded at the same time
+BACKFILL_WORKERS = 4
+# Upper bound on pages walked per feed in one run
+MAX_PAGES = 2000
+# Consecutive failed fetches of one page before the run gives up; it can be resumed
+MAX_PAGE_FAILURES = 5
+# More items than any feed page holds, so every page is read in full
+PAGE_ITEMS = 1000
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+
+BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+    }
+)
+
+BACKFILL_STATES = ["idle", "running", "done", "failed", "cancelled"]
+
+
+def signal_backfill(entry_id: str) -> str:
+    """Dispatcher signal sent when an entry's backfill progress changes."""
+    return f"{DOMAIN}_{entry_id}_backfill"
+
+
+class BackfillFailed(Exception):
+    """A feed page could not be fetched or parsed."""
+
+
+@dataclass
+class BackfillProgress:
+    """Counters of the current or last backfill run of a config entry."""
+
+    status: str = "idle"
+    feed: str | None = None
+    page: int = 0
+    found: int = 0
+    downloaded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    error: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class Backfill:
+    """Archives the older strips of every feed of a config entry.
+
+    Feed pages (?paged=N) are fetched one at a time, newest first. Their items
+    in the date range go through a bounded queue to BACKFILL_WORKERS download
+    workers, and the next page is only fetched once the current one is done,
+    so memory stays flat however many strips are archived. The next page of
+    each feed is stored after every page, so an interrupted run over the same
+    range resumes where it stopped. Items already in the archive are skipped
+    without a download, and identical images are stored once by content hash.
+    The run stops once the archive is full, instead of downloading older
+    strips that would only be evicted again.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, feeds: list[str], archive: ComicArchive):
+        self.hass = hass
+        self.entry_id = entry_id
+        self.feeds = feeds
+        self._archive = archive
+        self.progress = BackfillProgress()
+        # Set once an archived strip was evicted right away; every older one would be too
+        self._archive_full = False
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+
+    @property
+    def running(self) -> bool:
+        return self.progress.status == "running"
+
+    def _notify(self) -> None:
+        async_dispatcher_send(self.hass, signal_backfill(self.entry_id))
+
+    @callback
+    def async_start(self, entry: ConfigEntry, start: date | None, end: date | None) -> None:
+        """Start a run in the background; it is cancelled when the entry unloads."""
+        self.progress = BackfillProgress(status="running")
+        self._archive_full = False
+        self._notify()
+        entry.async_create_background_task(
+            self.hass, self._async_run(start, end), f"{DOMAIN} backfill {self.entry_id}"
+        )
+
+    async def _async_run(self, start: date | None, end: date | None) -> None:
+        stored = await self._store.async_load() or {}
+        date_range = [start.isoformat() if start else None, end.isoformat() if end else None]
+        try:
+            for feed_url in self.feeds:
+                resume = stored.get(feed_url)
+                first_page = resume["page"] if resume and resume.get("range") == date_range else 1
+                await self._async_backfill_feed(feed_url, start, end, first_page, stored, date_range)
+                stored.pop(feed_url, None)
+                await self._store.async_save(stored)
+        except BackfillFailed as err:
+            _LOGGER.warning("Backfill stopped, it resumes from page %s when run again: %s", self.progress.page, err)
+            self.progress.status = "failed"
+            self.progress.error = str(err)
+        except asyncio.CancelledError:
+            self.progress.status = "cancelled"
+            self._notify()
+            raise
+        else:
+            self.progress.status = "done"
+            _LOGGER.info(
+                "Backfill done: %s strips downloaded, %s already archived, %s failed",
+                self.progress.downloaded, self.progress.skipped, self.progress.failed,
+            )
+        self._notify()
+
+    async def _async_backfill_feed(
+        self, feed_url: str, start: date | None, end: date | None, first_page: int, stored: dict, date_range: list
+    ) -> None:
+        slug = feed_slug(feed_url)
+        # Temporary files go next to the archive, so adding them never crosses filesystems
+        directory = self.hass.config.path("www")
+        queue: asyncio.Queue[FeedItem] = asyncio.Queue(maxsize=BACKFILL_WORKERS * 2)
+        workers = [
+            self.hass.async_create_task(self._async_worker(queue, slug, directory)) for _ in range(BACKFILL_WORKERS)
+        ]
+        try:
+            for page in range(first_page, MAX_PAGES + 1):
+                self.progress.feed = slug
+                self.progress.page = page
+                items = await self._async_fetch_page(feed_url, page)
+                if not items:
+                    return
+                past_range = False
+                for item in items:
+                    published = parse_pub_date(item.pub_date)
+                    day = dt_util.as_local(published).date() if published else None
+                    if day and end and day > end:
+                        continue
+                    if day and start and day < start:
+                        # Pages are newest first, so every later page is older still
+                        past_range = True
+                        continue
+                    if not item.image_url:
+                        continue
+                    self.progress.found += 1
+                    await queue.put(item)
+                await queue.join()
+                if self._archive_full:
+                    raise BackfillFailed(
+                        f"The archive is full at {self._archive.max_count} comics or "
+                        f"{self._archive.max_bytes // (1024 * 1024)} MB, raise its limits to keep older strips"
+                    )
+                stored[feed_url] = {"page": page + 1, "range": date_range}
+                await self._store.async_save(stored)
+                self._notify()
+                if past_range:
+                    return
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _async_fetch_page(self, feed_url: str, page: int) -> list[FeedItem]:
+        """Return the items of one feed page, [] past the last page."""
+        url = str(URL(feed_url).update_query(paged=page))
+        breaker = async_get_breaker(self.hass)
+        failures = 0
+        while True:
+            if wait := breaker.acquire(url):
+                await asyncio.sleep(wait)
+                continue
+            retry_wait = None
+            try:
+                async with async_get_session(self.hass).get(url, timeout=REQUEST_TIMEOUT) as resp:
+                    if resp.status == 404:
+                        breaker.record_success(url)
+                        return []
+                    if is_item_error(resp.status):
+                        breaker.record_success(url)
+                        raise BackfillFailed(f"Failed to fetch {url}: HTTP {resp.status}")
+                    if resp.status != 200:
+                        retry_wait = retry_after(resp)
+                        raise aiohttp.ClientError(f"HTTP {resp.status}")
+                    items = await async_read_items(resp, limit=PAGE_ITEMS)
+                breaker.record_success(url)
+                return items
+            except ET.ParseError as err:
+                breaker.record_success(url)
+                raise BackfillFailed(f"Failed to parse {url}: {err}") from err
+            except (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror) as err:
+                breaker.record_failure(url, retry_wait)
+                failures += 1
+                if failures >= MAX_PAGE_FAILURES:
+                    raise BackfillFailed(f"Failed to fetch {url}: {err!r}") from err
+
+    async def _async_worker(self, queue: asyncio.Queue, slug: str, directory: str) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await self._async_backfill_item(item, slug, directory)
+            except Exception:
+                _LOGGER.exception("Failed to backfill %s", item.image_url)
+                self.progress.failed += 1
+            finally:
+                queue.task_done()
+
+    async def _async_backfill_item(self, item: FeedItem, slug: str, directory: str) -> None:
+        if self._archive_full:
+            return
+        if item.guid and await self._archive.async_contains(slug, item.guid):
+            self.progress.skipped += 1
+            return
+        while True:
+            try:
+                archived = await async_archive_image(self.hass, self._archive, slug, item, directory)
+            except HostCoolingDown as err:
+                await asyncio.sleep(err.remaining)
+                continue
+            except ImageRejected as err:
+                _LOGGER.warning("Rejected comic image %s: %s", item.image_url, err)
+                self.progress.failed += 1
+                return
+            except HostFailed as err:
+                _LOGGER.debug("Failed to backfill %s: %s", item.image_url, err)
+                self.progress.failed += 1
+                return
+            break
+        if archived is None:
+            self._archive_full = True
+            return
+        self.progress.downloaded += 1
+
+
+@callback
+def async_register_backfill_service(hass: HomeAssistant) -> None:
+    """Register the backfill service."""
+
+    async def async_handle_backfill(call: ServiceCall) -> None:
+        start = call.data.get(ATTR_START_DATE)
+        end = call.data.get(ATTR_END_DATE)
+        if start and end and start > end:
+            raise HomeAssistantError("start_date must not be after end_date")
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        entries = [
+            entry
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.entry_id in hass.data.get(DOMAIN, {}) and entry_id in (None, entry.entry_id)
+        ]
+        if not entries:
+            raise HomeAssistantError(f"No loaded {DOMAIN} config entry {entry_id or ''}".strip())
+        for entry in entries:
+            backfill: Backfill = hass.data[DOMAIN][entry.entry_id]["backfill"]
+            if backfill.running:
+                raise HomeAssistantError(f"A backfill is already running for {entry.title}")
+        for entry in entries:
+            hass.data[DOMAIN][entry.entry_id]["backfill"].async_start(entry, start, end)
+
+    hass.services.async_register(DOMAIN, SERVICE_BACKFILL, async_handle_backfill, schema=BACKFILL_SCHEMA)
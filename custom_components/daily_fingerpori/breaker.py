@@ -0,0 +1,157 @@
+"""Per-host circuit breaker so a darkball outage costs one quick failure per cooldown."""
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from aiohttp import ClientResponse, hdrs
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_BREAKER
+
+# First cooldown after a failure, in seconds
+BASE_COOLDOWN = 30
+# Longest jittered cooldown, in seconds
+MAX_COOLDOWN = 60 * 60
+# Longest Retry-After honored, in seconds; anything beyond is treated as a day
+MAX_RETRY_AFTER = 24 * 60 * 60
+
+
+@dataclass
+class HostState:
+    """Consecutive failures of one host, the URLs that failed, and when it may be tried again."""
+
+    failures: int = 0
+    cooldown: float = 0
+    open_until: float = 0
+    # Whether open_until is only holding the circuit for a request let through after a cooldown
+    probing: bool = False
+    failed_urls: set[str] = field(default_factory=set)
+
+
+def is_item_error(status: int) -> bool:
+    """Return whether an HTTP error status is about the requested URL rather than its host.
+
+    A 404 or 403 proves the host is up, so asking it again sooner or later
+    changes nothing; only 408 and 429 ask the client to back off.
+    """
+    return 400 <= status < 500 and status not in (408, 429)
+
+
+def retry_after(resp: ClientResponse) -> float | None:
+    """Return the Retry-After of a response in seconds, given as seconds or an HTTP date."""
+    value = resp.headers.get(hdrs.RETRY_AFTER)
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return min(max(0.0, (when - datetime.now(timezone.utc)).total_seconds()), MAX_RETRY_AFTER)
+
+
+class HostCoolingDown(Exception):
+    """No request was made because the host's circuit is open."""
+
+    def __init__(self, remaining: float):
+        super().__init__(f"host is cooling down for another {remaining:.0f} s")
+        self.remaining = remaining
+
+
+class HostFailed(Exception):
+    """A request failed and opened its host's circuit for cooldown seconds."""
+
+    def __init__(self, message: str, cooldown: float):
+        super().__init__(message)
+        self.cooldown = cooldown
+
+
+class CircuitBreaker:
+    """Track failures per host and refuse requests while a host cools down.
+
+    Every failure opens the circuit for a cooldown drawn with decorrelated
+    jitter (uniform between BASE_COOLDOWN and three times the previous one,
+    capped at MAX_COOLDOWN), or for the server's Retry-After if that is
+    longer. Once it has passed, one request is let through; failure opens
+    the circuit again with a longer cooldown. Success of a URL clears only
+    that URL's failures: the feed loading fine says nothing about an image
+    on the same host that keeps failing, so its cooldown keeps growing. The
+    jitter keeps installations that saw the same outage from polling in
+    lockstep afterwards.
+    """
+
+    def __init__(self):
+        self._hosts: dict[str, HostState] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def acquire(self, url: str) -> float:
+        """Return 0 if url's host may be requested now, else seconds left to wait.
+
+        A request let through after a cooldown holds the circuit for other
+        callers until its outcome is recorded (or BASE_COOLDOWN passes). Once
+        the host has answered since its last failure, nothing is held.
+        """
+        state = self._hosts.get(self._host(url))
+        if state is None or not state.open_until:
+            return 0
+        now = time.monotonic()
+        if state.open_until > now:
+            return state.open_until - now
+        state.open_until = now + BASE_COOLDOWN
+        state.probing = True
+        return 0
+
+    def remaining(self, url: str) -> float:
+        """Return seconds until url's host may be requested again, 0 if it may now."""
+        state = self._hosts.get(self._host(url))
+        if state is None:
+            return 0
+        return max(0.0, state.open_until - time.monotonic())
+
+    def failures(self, url: str) -> int:
+        """Return the host's consecutive failures if url is one of the URLs that failed."""
+        state = self._hosts.get(self._host(url))
+        return state.failures if state and url in state.failed_urls else 0
+
+    def record_success(self, url: str) -> None:
+        host = self._host(url)
+        state = self._hosts.get(host)
+        if state is None:
+            return
+        state.failed_urls.discard(url)
+        if not state.failed_urls:
+            del self._hosts[host]
+        elif state.probing:
+            # The host answered, so release the probe's hold, but keep the
+            # history of the URLs still failing
+            state.probing = False
+            state.open_until = 0
+
+    def record_failure(self, url: str, retry_after: float | None = None) -> float:
+        """Open the circuit for url's host and return the cooldown in seconds."""
+        state = self._hosts.setdefault(self._host(url), HostState())
+        state.failures += 1
+        state.failed_urls.add(url)
+        state.probing = False
+        state.cooldown = min(MAX_COOLDOWN, random.uniform(BASE_COOLDOWN, (state.cooldown or BASE_COOLDOWN) * 3))
+        cooldown = max(state.cooldown, retry_after or 0)
+        state.open_until = time.monotonic() + cooldown
+        return cooldown
+
+
+def async_get_breaker(hass: HomeAssistant) -> CircuitBreaker:
+    """Return the circuit breaker shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_BREAKER not in domain_data:
+        domain_data[DATA_BREAKER] = CircuitBreaker()
+    return domain_data[DATA_BREAKER]
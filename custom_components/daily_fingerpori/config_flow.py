@@ -1,19 +1,50 @@
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_NAME
-from .const import DOMAIN, DEFAULT_NAME, CONF_REFRESH_INTERVAL
+from homeassistant.helpers import config_validation as cv
+from .const import (
+    DOMAIN,
+    DEFAULT_NAME,
+    CONF_REFRESH_INTERVAL,
+    CONF_FEEDS,
+    CONF_ARCHIVE_MAX_COUNT,
+    CONF_ARCHIVE_MAX_MB,
+    CONF_VARIANTS,
+    CONF_REFRESH_DEADLINE,
+    DEFAULT_ARCHIVE_MAX_COUNT,
+    DEFAULT_ARCHIVE_MAX_MB,
+    DEFAULT_REFRESH_DEADLINE,
+    FEED_URL,
+)
+from .variants import VARIANTS
+
+_VARIANT_CHOICES = {name: name for name in VARIANTS}
 
 class FingerporiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None):
         if user_input is not None:
             return self.async_create_entry(title=DEFAULT_NAME, data={}, options={
-                CONF_REFRESH_INTERVAL: user_input[CONF_REFRESH_INTERVAL]
+                CONF_REFRESH_INTERVAL: user_input[CONF_REFRESH_INTERVAL],
+                CONF_FEEDS: user_input[CONF_FEEDS],
+                CONF_ARCHIVE_MAX_COUNT: user_input[CONF_ARCHIVE_MAX_COUNT],
+                CONF_ARCHIVE_MAX_MB: user_input[CONF_ARCHIVE_MAX_MB],
+                CONF_VARIANTS: user_input[CONF_VARIANTS],
+                CONF_REFRESH_DEADLINE: user_input[CONF_REFRESH_DEADLINE],
             })
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema({
                 # Default update interval now 3 hours
-                vol.Optional(CONF_REFRESH_INTERVAL, default=3): int
+                vol.Optional(CONF_REFRESH_INTERVAL, default=3): int,
+                # Comma separated darkball RSS feeds, one image entity per strip
+                vol.Optional(CONF_FEEDS, default=FEED_URL): str,
+                # Archive limits: oldest-accessed comics are evicted past either one
+                vol.Optional(CONF_ARCHIVE_MAX_COUNT, default=DEFAULT_ARCHIVE_MAX_COUNT): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_ARCHIVE_MAX_MB, default=DEFAULT_ARCHIVE_MAX_MB): vol.All(int, vol.Range(min=1)),
+                # Extra resized/grayscale image entities, rendered once per new comic
+                vol.Optional(CONF_VARIANTS, default=[]): cv.multi_select(_VARIANT_CHOICES),
+                # Seconds one refresh may take in total before it gives up until the next poll
+                vol.Optional(CONF_REFRESH_DEADLINE, default=DEFAULT_REFRESH_DEADLINE): vol.All(int, vol.Range(min=10)),
             })
         )
 
@@ -28,12 +59,22 @@ class FingerporiOptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_init(self, user_input=None):
         if user_input is not None:
             return self.async_create_entry(title="", data={
-                CONF_REFRESH_INTERVAL: user_input[CONF_REFRESH_INTERVAL]
+                CONF_REFRESH_INTERVAL: user_input[CONF_REFRESH_INTERVAL],
+                CONF_FEEDS: user_input[CONF_FEEDS],
+                CONF_ARCHIVE_MAX_COUNT: user_input[CONF_ARCHIVE_MAX_COUNT],
+                CONF_ARCHIVE_MAX_MB: user_input[CONF_ARCHIVE_MAX_MB],
+                CONF_VARIANTS: user_input[CONF_VARIANTS],
+                CONF_REFRESH_DEADLINE: user_input[CONF_REFRESH_DEADLINE],
             })
         options = self.config_entry.options
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema({
-                vol.Optional(CONF_REFRESH_INTERVAL, default=options.get(CONF_REFRESH_INTERVAL, 3)): int
+                vol.Optional(CONF_REFRESH_INTERVAL, default=options.get(CONF_REFRESH_INTERVAL, 3)): int,
+                vol.Optional(CONF_FEEDS, default=options.get(CONF_FEEDS, FEED_URL)): str,
+                vol.Optional(CONF_ARCHIVE_MAX_COUNT, default=options.get(CONF_ARCHIVE_MAX_COUNT, DEFAULT_ARCHIVE_MAX_COUNT)): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_ARCHIVE_MAX_MB, default=options.get(CONF_ARCHIVE_MAX_MB, DEFAULT_ARCHIVE_MAX_MB)): vol.All(int, vol.Range(min=1)),
+                vol.Optional(CONF_VARIANTS, default=options.get(CONF_VARIANTS, [])): cv.multi_select(_VARIANT_CHOICES),
+                vol.Optional(CONF_REFRESH_DEADLINE, default=options.get(CONF_REFRESH_DEADLINE, DEFAULT_REFRESH_DEADLINE)): vol.All(int, vol.Range(min=10)),
             })
         )
@@ -6,4 +6,59 @@ FILENAME = "fingerpori_latest.gif"
 FEED_URL = "https://darkball.net/fingerpori/?feed=rss"
 
 # Config key for refresh interval (hours) - use a stable key for translations
-CONF_REFRESH_INTERVAL = "refresh_interval"
\ No newline at end of file
+CONF_REFRESH_INTERVAL = "refresh_interval"
+# Config key for the comma separated list of darkball RSS feeds to follow
+CONF_FEEDS = "feeds"
+
+# Config key for the pre-rendered image variants (see variants.VARIANTS) to produce
+CONF_VARIANTS = "variants"
+
+# Config key for the time budget (seconds) of one whole refresh cycle
+CONF_REFRESH_DEADLINE = "refresh_deadline"
+DEFAULT_REFRESH_DEADLINE = 60
+# Per-request limits (seconds) for connecting, and for waiting on the next bytes of a response
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 20
+
+# Config keys limiting the comic archive by number of comics and total size (MB)
+CONF_ARCHIVE_MAX_COUNT = "archive_max_count"
+CONF_ARCHIVE_MAX_MB = "archive_max_mb"
+DEFAULT_ARCHIVE_MAX_COUNT = 365
+DEFAULT_ARCHIVE_MAX_MB = 200
+
+# Archived comics are served from www/ (i.e. /local/); the index lives in the config dir
+ARCHIVE_DIR = "daily_fingerpori_archive"
+ARCHIVE_DB = "daily_fingerpori_archive.db"
+# Number of comics per strip listed when browsing the archive
+ARCHIVE_BROWSE_LIMIT = 100
+
+PLATFORMS = ["image", "button", "sensor"]
+
+# Largest comic image accepted from a feed
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Upper bound on feeds fetched at the same time in one refresh cycle; high enough
+# that every strip darkball hosts is fetched in one round trip. The shared
+# connector still limits connections per host.
+MAX_CONCURRENT_FEEDS = 16
+
+# Seconds a finished feed fetch is reused by other refresh triggers and config entries
+SINGLE_FLIGHT_WINDOW = 30
+
+# Served by view.FingerporiImageView, with an ETag and 304 support
+IMAGE_VIEW_URL = "/api/daily_fingerpori/image/{0}?token={1}"
+
+# Keys in hass.data[DOMAIN] shared by all config entries
+DATA_SESSION = "session"
+DATA_CONNECTION_STATS = "connection_stats"
+DATA_IMAGE_CACHE = "image_cache"
+DATA_ARCHIVE = "archive"
+DATA_SINGLE_FLIGHT = "single_flight"
+DATA_IMAGE_ENTITIES = "image_entities"
+DATA_BREAKER = "breaker"
+DATA_PROFILER = "profiler"
+
+# Service walking older feed pages into the archive
+SERVICE_BACKFILL = "backfill"
+# Service capturing cProfile and tracemalloc data of the next refreshes
+SERVICE_PROFILE = "profile"
@@ -0,0 +1,112 @@
+"""Coordinator fetching every configured comic feed in one refresh cycle."""
+import asyncio
+import logging
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .archive import ComicArchive
+from .breaker import async_get_breaker
+from .const import DEFAULT_REFRESH_DEADLINE, MAX_CONCURRENT_FEEDS
+from .fetch import connection_stats
+from .fetcher import ComicResult, FeedFetcher, FeedStateStore
+from .profiler import get_profiler
+from .schedule import next_poll_delay
+from .stats import FetchStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Soonest poll after a feed was skipped for a host that has recovered since, in seconds
+MIN_RETRY_DELAY = 5
+
+
+class ComicCoordinator(DataUpdateCoordinator):
+    """Refresh all feeds of a config entry together.
+
+    Each feed has its own fetcher.FeedFetcher. They run concurrently, bounded
+    by a semaphore, within one deadline for the whole cycle. Data is a dict
+    mapping each feed URL to its ComicResult (None when nothing changed or the
+    fetch failed).
+
+    The configured interval is only an upper bound: the fetchers record each
+    feed's pubDates and the coordinator polls often while a new strip is
+    expected and rarely otherwise (see schedule.py).
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        feeds: dict[str, str],
+        update_interval: timedelta,
+        archive: ComicArchive,
+        variants: list[str] | None = None,
+        deadline: float = DEFAULT_REFRESH_DEADLINE,
+    ):
+        super().__init__(hass, _LOGGER, name="fingerpori_image", update_interval=update_interval)
+        # Seconds one refresh cycle may take in total, across all feeds
+        self.deadline = deadline
+        # Feed URL -> path of the image file it is written to
+        self.feeds = feeds
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_FEEDS)
+        # Names of the pre-rendered variants (see variants.VARIANTS) to produce per new comic
+        self.variants = variants or []
+        # Configured refresh interval; adaptive polling never waits longer than this
+        self._max_interval = update_interval
+        self._state = FeedStateStore(hass, entry_id)
+        self.fetchers = {
+            url: FeedFetcher(hass, url, path, self._state, archive, self.variants, deadline)
+            for url, path in feeds.items()
+        }
+        # Per feed: latency, byte, retry and error instrumentation
+        self.stats: dict[str, FetchStats] = {url: fetcher.stats for url, fetcher in self.fetchers.items()}
+
+    async def async_load_state(self) -> None:
+        """Restore the fetchers' state, and serve the comics already on disk until the first refresh has run.
+
+        Feeds whose file is gone are left out, so they are fetched as usual.
+        """
+        await self._state.async_load()
+        self.data = {url: fetcher.last_comic for url, fetcher in self.fetchers.items()}
+        self.update_interval = self._next_interval()
+
+    async def async_save_state(self) -> None:
+        """Write the fetchers' state now, so a reloaded entry does not restore stale files."""
+        await self._state.async_save()
+
+    def _next_interval(self) -> timedelta:
+        """Poll as soon as any feed expects a new strip or a failed host may be retried.
+
+        A failed host is retried once its breaker cooldown is over, so polls
+        back off as the cooldown grows with consecutive failures.
+        """
+        now = dt_util.utcnow()
+        interval = min(
+            next_poll_delay(now, fetcher.publications, self._max_interval) for fetcher in self.fetchers.values()
+        )
+        breaker = async_get_breaker(self.hass)
+        for fetcher in self.fetchers.values():
+            if fetcher.failed_url:
+                retry_in = max(breaker.remaining(fetcher.failed_url), MIN_RETRY_DELAY)
+                interval = min(interval, timedelta(seconds=retry_in))
+        return interval
+
+    async def _async_update_data(self) -> dict[str, ComicResult | None]:
+        with get_profiler(self.hass).track("refresh"):
+            return await self._async_refresh_feeds()
+
+    async def _async_refresh_feeds(self) -> dict[str, ComicResult | None]:
+        deadline = asyncio.get_running_loop().time() + self.deadline
+        results = await asyncio.gather(
+            *(self._async_fetch_limited(fetcher, deadline) for fetcher in self.fetchers.values())
+        )
+        _LOGGER.debug("Comic HTTP connections so far: %s", connection_stats(self.hass))
+        self.update_interval = self._next_interval()
+        _LOGGER.debug("Next comic poll in %s", self.update_interval)
+        return dict(zip(self.fetchers, results))
+
+    async def _async_fetch_limited(self, fetcher: FeedFetcher, deadline: float) -> ComicResult | None:
+        async with self._semaphore:
+            return await fetcher.async_fetch(deadline)
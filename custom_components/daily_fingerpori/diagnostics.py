@@ -0,0 +1,28 @@
+"""Diagnostics download for Daily Fingerpori."""
+from dataclasses import asdict
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .fetch import connection_stats
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return fetch pipeline metrics and the latest result of every feed."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    data = coordinator.data or {}
+    return {
+        "options": dict(entry.options),
+        "update_interval": str(coordinator.update_interval),
+        "last_update_success": coordinator.last_update_success,
+        "connections": asdict(connection_stats(hass)),
+        "feeds": {
+            feed_url: {
+                "image_path": image_path,
+                "stats": coordinator.stats[feed_url].as_dict(),
+                "last_result": result.as_dict() if (result := data.get(feed_url)) else None,
+            }
+            for feed_url, image_path in coordinator.feeds.items()
+        },
+    }
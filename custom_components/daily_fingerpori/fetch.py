@@ -0,0 +1,395 @@
+"""Shared HTTP helpers for the Daily Fingerpori fetch pipeline."""
+import asyncio
+import hashlib
+import os
+import re
+import socket
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Awaitable, Callable, Container
+from dataclasses import dataclass
+from typing import Any
+
+from urllib.parse import urlparse
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.util import slugify
+
+from .archive import ArchivedComic, ComicArchive
+from .breaker import HostCoolingDown, HostFailed, async_get_breaker, is_item_error, retry_after
+from .const import (
+    DOMAIN,
+    DATA_SESSION,
+    DATA_CONNECTION_STATS,
+    DATA_SINGLE_FLIGHT,
+    FEED_URL,
+    MAX_IMAGE_BYTES,
+    SINGLE_FLIGHT_WINDOW,
+    CONNECT_TIMEOUT,
+    READ_TIMEOUT,
+)
+from .stats import FetchStats
+
+# Bytes handed to the XML parser per read while the feed streams in
+FEED_CHUNK_SIZE = 8192
+# Bytes written to the temporary file per executor job while an image streams in
+IMAGE_CHUNK_SIZE = 65536
+# No total per request: a stalled connect or read fails on its own, and the
+# caller's deadline bounds the whole refresh
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+
+_IMAGE_EXT_RE = re.compile(r"\.(?:gif|png|jpe?g)$", re.IGNORECASE)
+_IMG_SRC_RE = re.compile(r'src=["\']([^"\']+\.(?:gif|png|jpe?g))["\']', re.IGNORECASE)
+
+
+@dataclass
+class FeedItem:
+    """Fields of one RSS <item> needed to fetch its comic."""
+
+    guid: str | None
+    pub_date: str | None
+    image_url: str | None
+
+    @property
+    def key(self) -> str | None:
+        """Identity of the item; feeds without GUIDs fall back to the image URL."""
+        return self.guid or self.image_url or self.pub_date
+
+
+@dataclass
+class DownloadedImage:
+    """An image streamed to a temporary file; the caller moves or removes the file."""
+
+    path: str
+    size: int
+    sha256: str
+    content_type: str
+    # (ETag, Last-Modified) sent with the image
+    validators: tuple[str | None, str | None] = (None, None)
+
+
+class ImageRejected(Exception):
+    """The server answered with something that is not an acceptable comic image."""
+
+
+@dataclass
+class ConnectionStats:
+    """Counts of new versus reused pooled connections."""
+
+    created: int = 0
+    reused: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.created} opened, {self.reused} reused ({self.reuse_ratio:.0%} reuse)"
+
+
+class SingleFlight:
+    """Coalesce concurrent fetches of the same feed into one round trip.
+
+    Callers for a key that is already being fetched await the in-flight task
+    instead of starting their own, and a finished result is handed out again
+    for `window` seconds. Shielding keeps one cancelled caller from cancelling
+    the fetch the others are waiting on.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float):
+        self.hass = hass
+        self.window = window
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._results: dict[str, tuple[float, Any]] = {}
+        self.coalesced = 0
+
+    async def run(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self._results.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.window:
+            self.coalesced += 1
+            return cached[1]
+        task = self._inflight.get(key)
+        if task is None:
+            task = self.hass.async_create_task(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._results[key] = (time.monotonic(), task.result())
+
+
+def async_get_single_flight(hass: HomeAssistant) -> SingleFlight:
+    """Return the request coalescer shared by all config entries."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SINGLE_FLIGHT not in domain_data:
+        domain_data[DATA_SINGLE_FLIGHT] = SingleFlight(hass, SINGLE_FLIGHT_WINDOW)
+    return domain_data[DATA_SINGLE_FLIGHT]
+
+
+def async_get_session(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return the pooled session shared by every fetch of this Home Assistant instance.
+
+    The session sits on Home Assistant's shared connector (keep-alive and DNS
+    cache) and is closed automatically when Home Assistant stops.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    session = domain_data.get(DATA_SESSION)
+    if session is None:
+        stats = ConnectionStats()
+
+        async def _on_connection_create(_session, _ctx, _params) -> None:
+            stats.created += 1
+
+        async def _on_connection_reuse(_session, _ctx, _params) -> None:
+            stats.reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(_on_connection_create)
+        trace_config.on_connection_reuseconn.append(_on_connection_reuse)
+
+        session = async_create_clientsession(hass, trace_configs=[trace_config])
+        domain_data[DATA_SESSION] = session
+        domain_data[DATA_CONNECTION_STATS] = stats
+    return session
+
+
+def connection_stats(hass: HomeAssistant) -> ConnectionStats:
+    """Return connection reuse counters of the shared session."""
+    async_get_session(hass)
+    return hass.data[DOMAIN][DATA_CONNECTION_STATS]
+
+
+def feed_slug(feed_url: str) -> str:
+    """Return a short stable name for a feed, e.g. "fingerpori" for darkball's Fingerpori feed."""
+    parsed = urlparse(feed_url)
+    path = parsed.path.strip("/")
+    return slugify(path.split("/")[0] if path else parsed.hostname or feed_url)
+
+
+def feed_display_name(title: str, feed_url: str) -> str:
+    """Return the name used for a strip's entities; the Fingerpori feed keeps the entry title."""
+    if feed_url == FEED_URL:
+        return title
+    return f"{title} {feed_slug(feed_url).replace('_', ' ').title()}"
+
+
+def conditional_headers(validators: dict, url: str) -> dict[str, str]:
+    """Return If-None-Match / If-Modified-Since headers for a previously fetched URL."""
+    headers = {}
+    etag, last_modified = validators.get(url, (None, None))
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def response_validators(resp: aiohttp.ClientResponse) -> tuple[str | None, str | None]:
+    """Return the (ETag, Last-Modified) pair sent by the server, if any."""
+    return resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+
+def image_ext(image_url: str) -> str:
+    """Return the file extension archived comics of an image URL get."""
+    return os.path.splitext(urlparse(image_url).path)[1].lower() or ".gif"
+
+
+def _find_image_url(item: ET.Element) -> str | None:
+    """Return the enclosure URL, or the first <img src> found in the item's text."""
+    enclosure = item.find("enclosure")
+    if enclosure is not None and "url" in enclosure.attrib:
+        return enclosure.attrib["url"]
+    for elem in item.iter():
+        src = elem.get("src")
+        if src and _IMAGE_EXT_RE.search(src):
+            return src
+        # Image markup is usually escaped or CDATA text inside <description>/<content:encoded>
+        if elem.text:
+            m = _IMG_SRC_RE.search(elem.text)
+            if m:
+                return m.group(1)
+    return None
+
+
+async def async_read_items(
+    resp: aiohttp.ClientResponse,
+    known: Container[str] = frozenset(),
+    limit: int = 1,
+    stats: FetchStats | None = None,
+) -> list[FeedItem]:
+    """Parse the feed incrementally as it streams in and return its newest items.
+
+    Stops at the first item whose key is in known (which is not returned) or
+    after limit items, and closes the connection there, so the rest of the feed
+    is never downloaded or parsed. Raises ET.ParseError on malformed XML.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    items: list[FeedItem] = []
+    parse_time = 0.0
+    async for chunk in resp.content.iter_chunked(FEED_CHUNK_SIZE):
+        if stats:
+            stats.add_bytes(len(chunk))
+        start = time.monotonic()
+        parser.feed(chunk)
+        events = list(parser.read_events())
+        parse_time += time.monotonic() - start
+        if stats:
+            stats.parse_time = parse_time
+        for _event, elem in events:
+            if elem.tag != "item":
+                continue
+            item = FeedItem(
+                guid=elem.findtext("guid"),
+                pub_date=elem.findtext("pubDate") or None,
+                image_url=_find_image_url(elem),
+            )
+            if item.key in known:
+                resp.close()
+                return items
+            items.append(item)
+            if len(items) >= limit:
+                resp.close()
+                return items
+    parser.close()
+    return items
+
+
+def _open_temp_file(directory: str):
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".part")
+    return path, os.fdopen(fd, "wb")
+
+
+def _discard_temp_file(f, path: str) -> None:
+    f.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def async_download_image(
+    hass: HomeAssistant,
+    resp: aiohttp.ClientResponse,
+    directory: str,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    stats: FetchStats | None = None,
+) -> DownloadedImage:
+    """Stream an image response into a temporary file in directory, hashing it on the way.
+
+    Only one chunk is held in memory at a time. Raises ImageRejected when the response
+    is not an image or exceeds max_bytes; the partial file is removed on any failure.
+    """
+    content_type = resp.content_type
+    # Some CDNs label images as a generic binary download
+    if not content_type.startswith("image/") and content_type != "application/octet-stream":
+        raise ImageRejected(f"unexpected content type {content_type}")
+    if resp.content_length is not None and resp.content_length > max_bytes:
+        raise ImageRejected(f"image is {resp.content_length} bytes, limit is {max_bytes}")
+
+    path, f = await hass.async_add_executor_job(_open_temp_file, directory)
+    hasher = hashlib.sha256()
+    size = 0
+    write_time = 0.0
+    try:
+        async for chunk in resp.content.iter_chunked(IMAGE_CHUNK_SIZE):
+            size += len(chunk)
+            if stats:
+                stats.add_bytes(len(chunk))
+            if size > max_bytes:
+                raise ImageRejected(f"image exceeds {max_bytes} bytes")
+            hasher.update(chunk)
+            start = time.monotonic()
+            await hass.async_add_executor_job(f.write, chunk)
+            write_time += time.monotonic() - start
+        start = time.monotonic()
+        await hass.async_add_executor_job(f.close)
+        write_time += time.monotonic() - start
+        if stats:
+            stats.write_time = write_time
+    except BaseException:
+        # Also runs on cancellation, so clean up without awaiting
+        _discard_temp_file(f, path)
+        raise
+    return DownloadedImage(path, size, hasher.hexdigest(), content_type)
+
+
+async def async_fetch_image(
+    hass: HomeAssistant,
+    url: str,
+    directory: str,
+    headers: dict[str, str] | None = None,
+    stats: FetchStats | None = None,
+) -> DownloadedImage | None:
+    """GET an image through its host's circuit breaker and stream it to a temporary file.
+
+    Returns None when the server answers 304 to the conditional headers. Raises
+    HostCoolingDown without a request while the host cools down, HostFailed
+    once a failed request has opened the host's circuit, and ImageRejected when
+    the host answered with something that is not an acceptable image, including
+    client errors such as 404, which leave the circuit closed.
+    """
+    breaker = async_get_breaker(hass)
+    if wait := breaker.acquire(url):
+        if stats:
+            stats.short_circuits += 1
+        raise HostCoolingDown(wait)
+    if stats and breaker.failures(url):
+        stats.retries += 1
+    retry_wait = None
+    downloaded = None
+    try:
+        async with async_get_session(hass).get(url, timeout=REQUEST_TIMEOUT, headers=headers) as resp:
+            if resp.status != 304:
+                if is_item_error(resp.status):
+                    raise ImageRejected(f"HTTP {resp.status}")
+                if resp.status != 200:
+                    retry_wait = retry_after(resp)
+                    raise aiohttp.ClientError(f"HTTP {resp.status}")
+                downloaded = await async_download_image(hass, resp, directory, stats=stats)
+                downloaded.validators = response_validators(resp)
+    except ImageRejected:
+        # The host answered; a bad image is not a reason to back off
+        breaker.record_success(url)
+        raise
+    except (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror) as err:
+        raise HostFailed(repr(err), breaker.record_failure(url, retry_wait)) from err
+    breaker.record_success(url)
+    return downloaded
+
+
+async def async_archive_image(
+    hass: HomeAssistant,
+    archive: ComicArchive,
+    feed: str,
+    item: FeedItem,
+    directory: str,
+    stats: FetchStats | None = None,
+    deadline: float | None = None,
+) -> ArchivedComic | None:
+    """Download an item's image into the archive, raising like async_fetch_image.
+
+    The temporary file goes to directory, which should be on the archive's
+    filesystem. deadline (an event loop time) bounds the download only;
+    TimeoutError is raised when it passes. Returns None when the archive is
+    full of newer comics, see ComicArchive.add.
+    """
+    async with asyncio.timeout_at(deadline):
+        downloaded = await async_fetch_image(hass, item.image_url, directory, stats=stats)
+    if downloaded is None:
+        raise ImageRejected("unexpected 304 Not Modified")
+    try:
+        return await archive.async_add(
+            feed, item.guid, item.pub_date, downloaded.path, downloaded.sha256, image_ext(item.image_url)
+        )
+    finally:
+        await hass.async_add_executor_job(os.remove, downloaded.path)
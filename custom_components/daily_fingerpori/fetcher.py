@@ -0,0 +1,539 @@
+"""One fetcher per feed, shared by the config entry coordinator and the legacy platform."""
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+import xml.etree.ElementTree as ET
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .archive import ComicArchive
+from .breaker import CircuitBreaker, HostCoolingDown, HostFailed, async_get_breaker, is_item_error, retry_after
+from .const import DOMAIN, DEFAULT_REFRESH_DEADLINE
+from .fetch import (
+    REQUEST_TIMEOUT,
+    DownloadedImage,
+    FeedItem,
+    ImageRejected,
+    async_archive_image,
+    async_fetch_image,
+    async_get_session,
+    async_get_single_flight,
+    async_read_items,
+    conditional_headers,
+    feed_slug,
+    image_ext,
+    response_validators,
+)
+from .image_cache import get_image_cache
+from .schedule import HISTORY_SIZE, parse_pub_date
+from .stats import FetchStats
+from .variants import render_variants, variant_path
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Seconds to batch publication history, seen item, pending item and last comic writes
+HISTORY_SAVE_DELAY = 60
+# Item keys remembered per feed to recognise where the last poll stopped
+SEEN_ITEMS_SIZE = 50
+# Most new items taken from one poll; any further ones are skipped with a warning
+MAX_NEW_ITEMS = 10
+# Most earlier strips kept per feed for another archive attempt; the oldest are given up first
+PENDING_ITEMS_SIZE = 20
+
+
+# Helper to atomically move a downloaded file into place on executor
+def _replace_file(src: str, dst: str) -> float:
+    # mkstemp creates 0600 files; give the comic normal permissions before publishing it
+    os.chmod(src, 0o644)
+    os.replace(src, dst)
+    return os.stat(dst).st_mtime
+
+
+@dataclass
+class ComicResult:
+    """The comic a feed's image file holds after a fetch, or after a restart.
+
+    Only metadata: the bytes stay on disk and in the image cache. Entities
+    treat a changed image_hash as a new comic.
+    """
+
+    image_path: str
+    image_hash: str
+    image_size: int | None = None
+    content_type: str | None = None
+    pub_date: str | None = None
+    image_url: str | None = None
+    # When the comic was downloaded, as an ISO timestamp
+    updated_at: str | None = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def as_stored(self) -> dict:
+        """Return what is persisted; the path follows from the configuration."""
+        stored = asdict(self)
+        del stored["image_path"]
+        return stored
+
+    @classmethod
+    def from_stored(cls, image_path: str, stored: dict) -> "ComicResult":
+        names = {field.name for field in fields(cls)} - {"image_path"}
+        return cls(image_path=image_path, **{key: value for key, value in stored.items() if key in names})
+
+
+class FeedStateStore:
+    """Persists the state of several fetchers across restarts.
+
+    Seen items, strips still to be archived, publication times and the last
+    comic each go to one file per key (a config entry, or the legacy
+    platform), mapping feed URL to value.
+    Writes are batched, since they change with nearly every new strip, and
+    written out with async_save before a reload loads them again.
+    """
+
+    def __init__(self, hass: HomeAssistant, key: str):
+        self.fetchers: dict[str, "FeedFetcher"] = {}
+        self._stores = {
+            kind: Store(hass, STORAGE_VERSION, f"{DOMAIN}.{key}.{kind}")
+            for kind in ("publications", "seen_items", "pending_items", "last_comic")
+        }
+        # Kinds with a batched write still to come
+        self._unsaved: set[str] = set()
+
+    async def async_load(self) -> None:
+        """Restore every registered fetcher's state."""
+        publications = await self._stores["publications"].async_load() or {}
+        seen = await self._stores["seen_items"].async_load() or {}
+        pending = await self._stores["pending_items"].async_load() or {}
+        last_comics = await self._stores["last_comic"].async_load() or {}
+        for feed_url, fetcher in self.fetchers.items():
+            fetcher.publications = sorted(
+                t for t in map(dt_util.parse_datetime, publications.get(feed_url, [])) if t is not None
+            )
+            fetcher.seen = seen.get(feed_url, [])[:SEEN_ITEMS_SIZE]
+            fetcher.pending = [FeedItem(**item) for item in pending.get(feed_url, [])[:PENDING_ITEMS_SIZE]]
+            if comic := last_comics.get(feed_url):
+                await fetcher.async_restore_last_comic(comic)
+
+    def schedule_save(self, kind: str) -> None:
+        self._unsaved.add(kind)
+        self._stores[kind].async_delay_save(getattr(self, f"_{kind}_data"), HISTORY_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Write every batched change now."""
+        while self._unsaved:
+            kind = self._unsaved.pop()
+            await self._stores[kind].async_save(getattr(self, f"_{kind}_data")())
+
+    def _publications_data(self) -> dict[str, list[str]]:
+        return {url: [t.isoformat() for t in f.publications] for url, f in self.fetchers.items()}
+
+    def _seen_items_data(self) -> dict[str, list[str]]:
+        return {url: f.seen for url, f in self.fetchers.items()}
+
+    def _pending_items_data(self) -> dict[str, list[dict]]:
+        return {url: [asdict(item) for item in f.pending] for url, f in self.fetchers.items() if f.pending}
+
+    def _last_comic_data(self) -> dict[str, dict]:
+        return {url: f.last_comic.as_stored() for url, f in self.fetchers.items() if f.last_comic}
+
+
+class FeedFetcher:
+    """Fetch one RSS feed into its image file.
+
+    Owns everything one feed needs, whichever setup path uses it: conditional
+    request validators, the items already seen, publication times, the last
+    comic and FetchStats. Requests go over the pooled session, through the
+    per-host circuit breaker and single-flight coalescing, and the file is
+    published through the shared image cache.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        feed_url: str,
+        image_path: str,
+        state: FeedStateStore,
+        archive: ComicArchive | None = None,
+        variants: list[str] | None = None,
+        deadline: float = DEFAULT_REFRESH_DEADLINE,
+    ):
+        self.hass = hass
+        self.feed_url = feed_url
+        self.image_path = image_path
+        # Seconds one fetch may take when the caller sets no deadline of its own
+        self.deadline = deadline
+        self._state = state
+        state.fetchers[feed_url] = self
+        # None for the legacy platform, which keeps no archive
+        self._archive = archive
+        # Names of the pre-rendered variants (see variants.VARIANTS) to produce per new comic
+        self.variants = variants or []
+        # ETag / Last-Modified pairs from the last successful download, keyed by URL
+        self._validators: dict[str, tuple[str | None, str | None]] = {}
+        # Keys of the newest items already processed, newest first
+        self.seen: list[str] = []
+        # Earlier strips that failed to download into the archive, newest first
+        self.pending: list[FeedItem] = []
+        # Recently observed publication times, oldest first
+        self.publications: list[datetime] = []
+        # The comic on disk, restored on startup
+        self.last_comic: ComicResult | None = None
+        # URL whose host failed in the last fetch, retried once its cooldown is over
+        self.failed_url: str | None = None
+        # Latency, byte, retry and error instrumentation
+        self.stats = FetchStats()
+
+    async def async_restore_last_comic(self, stored: dict) -> None:
+        """Serve the comic already on disk until the first fetch has run.
+
+        Nothing is restored when the file is gone, so it is fetched as usual.
+        The restored hash also seeds the image cache, so downloading the same
+        comic again after a restart does not rewrite the file. Variants that
+        are missing or stale, e.g. just enabled in the options, are rendered
+        in the background rather than waiting for the next strip.
+        """
+        if not stored.get("image_hash"):
+            return
+        try:
+            mtime = await self.hass.async_add_executor_job(os.path.getmtime, self.image_path)
+        except OSError:
+            return
+        image_cache = get_image_cache(self.hass, self.image_path)
+        if image_cache.sha256 is None:
+            image_cache.expire(mtime, stored["image_hash"])
+        self.last_comic = ComicResult.from_stored(self.image_path, stored)
+        if self.variants:
+            self.hass.async_create_background_task(
+                self._async_render_variants(self.last_comic.image_hash), f"{DOMAIN} render variants"
+            )
+
+    async def async_fetch(self, deadline: float | None = None) -> ComicResult | None:
+        """Fetch the feed and return the new comic, None when nothing changed or the fetch failed.
+
+        deadline is an event loop time, so several fetchers can share one
+        refresh cycle's budget; by default the fetch gets self.deadline seconds.
+        """
+        if deadline is None:
+            deadline = asyncio.get_running_loop().time() + self.deadline
+        result = await async_get_single_flight(self.hass).run(
+            self.feed_url, lambda: self._async_fetch_counted(deadline)
+        )
+        # A coalesced result may come from another fetcher of the same feed
+        if result is not None:
+            self._record_publication(result.pub_date)
+            if self.last_comic is None or result.image_hash != self.last_comic.image_hash:
+                self.last_comic = result
+                self._state.schedule_save("last_comic")
+        return result
+
+    def _mark_seen(self, items: list[FeedItem]) -> None:
+        keys = [item.key for item in items if item.key]
+        if not keys:
+            return
+        self.seen = list(dict.fromkeys(keys + self.seen))[:SEEN_ITEMS_SIZE]
+        self._state.schedule_save("seen_items")
+
+    def _set_pending(self, item: FeedItem, pending: bool) -> None:
+        keys = [p.key for p in self.pending]
+        if pending == (item.key in keys):
+            return
+        if pending:
+            self.pending = [item, *self.pending][:PENDING_ITEMS_SIZE]
+        else:
+            self.pending = [p for p in self.pending if p.key != item.key]
+        self._state.schedule_save("pending_items")
+
+    def _record_publication(self, pub_date: str | None) -> None:
+        published = parse_pub_date(pub_date)
+        if published is None or published in self.publications:
+            return
+        self.publications.append(published)
+        self.publications.sort()
+        del self.publications[:-HISTORY_SIZE]
+        self._state.schedule_save("publications")
+
+    async def _async_fetch_counted(self, deadline: float) -> ComicResult | None:
+        """Fetch within what is left of the deadline (an event loop time).
+
+        Earlier strips still pending for the archive are tried again once the
+        feed has been fetched, so the feed request is the one that probes a
+        host after its cooldown.
+        The deadline bounds the downloads only, and is enforced here rather
+        than by the caller, so it also stops a fetch that single-flight callers
+        are sharing. Publishing a comic that has been downloaded always
+        completes. Running out of time says nothing about the host, so it is
+        not counted by the circuit breaker and the next poll comes on the
+        normal schedule.
+        """
+        self.stats.refreshes += 1
+        self.stats.last_bytes = 0
+        try:
+            result = await self._async_fetch_feed(deadline)
+            if self._archive and self.pending:
+                await asyncio.gather(*(self._async_archive_item(item, deadline) for item in self.pending))
+            return result
+        except asyncio.TimeoutError:
+            message = f"Refresh deadline of {self.deadline:.0f} s exceeded for {self.feed_url}"
+            _LOGGER.warning("%s, trying again on the next poll", message)
+            self.stats.record_error(message)
+            return None
+
+    def _breaker_allows(self, breaker: CircuitBreaker, url: str) -> bool:
+        """Fail fast while url's host cools down after failures."""
+        wait = breaker.acquire(url)
+        if not wait:
+            return True
+        self.stats.short_circuits += 1
+        self.failed_url = url
+        _LOGGER.debug("Skipping %s, host is cooling down for another %.0f s", url, wait)
+        return False
+
+    def _record_failure(self, url: str, cooldown: float, message: str) -> None:
+        self.failed_url = url
+        _LOGGER.warning("%s, retrying in %.0f s", message, cooldown)
+        self.stats.record_error(message)
+
+    async def _async_archive(self, item: FeedItem, path: str, image_hash: str) -> None:
+        """Keep a copy of a comic in the archive; failures never fail the fetch."""
+        if self._archive is None:
+            return
+        try:
+            await self._archive.async_add(
+                feed_slug(self.feed_url), item.guid, item.pub_date, path, image_hash, image_ext(item.image_url)
+            )
+        except (OSError, sqlite3.Error) as e:
+            _LOGGER.warning("Failed to archive comic %s: %s", item.image_url, e)
+
+    async def _async_render_variants(self, image_hash: str) -> None:
+        """Render the configured variants of a downloaded comic that are stale, on the executor."""
+        if not self.variants:
+            return
+        try:
+            mtimes = await self.hass.async_add_executor_job(
+                render_variants, self.image_path, self.variants, image_hash
+            )
+        except Exception as e:
+            _LOGGER.warning("Failed to render variants of %s: %s", self.image_path, e)
+            return
+        for name, mtime in mtimes.items():
+            get_image_cache(self.hass, variant_path(self.image_path, name)).expire(mtime, image_hash)
+
+    async def _async_fetch_feed(self, deadline: float) -> ComicResult | None:
+        """Process the items published in the feed since the last poll.
+        If download fails, keep existing file (do not overwrite with empty data).
+        Conditional requests are used so unchanged feeds and images cost a 304 only,
+        and the feed is only read up to the first item seen before, so an unchanged
+        head downloads nothing. The newest new item becomes the current comic;
+        older ones published between polls are downloaded alongside it into the archive.
+        Failures are not retried in place: the host's circuit breaker opens and
+        the next poll comes once its cooldown is over. Raises TimeoutError when
+        a download runs past the deadline (an event loop time)."""
+        feed_url = self.feed_url
+        stats = self.stats
+        breaker = async_get_breaker(self.hass)
+        self.failed_url = None
+        seen = self.seen
+        if not await self.hass.async_add_executor_job(os.path.exists, self.image_path):
+            # Nothing on disk to keep, so fetch everything unconditionally
+            self._validators.clear()
+            seen = []
+        try:
+            # Fetch RSS feed, parsing it as it streams in
+            if not self._breaker_allows(breaker, feed_url):
+                return None
+            items = []
+            feed_validators = (None, None)
+            wait = None
+            async with asyncio.timeout_at(deadline):
+                try:
+                    if breaker.failures(feed_url):
+                        stats.retries += 1
+                    headers = conditional_headers(self._validators, feed_url)
+                    start = time.monotonic()
+                    async with async_get_session(self.hass).get(feed_url, timeout=REQUEST_TIMEOUT, headers=headers) as resp:
+                        if resp.status == 304:
+                            breaker.record_success(feed_url)
+                            stats.feed_latency = time.monotonic() - start
+                            stats.not_modified += 1
+                            _LOGGER.debug("Feed not modified since last poll, skipping download")
+                            return None
+                        if is_item_error(resp.status):
+                            # The host is up, so there is nothing to back off from
+                            breaker.record_success(feed_url)
+                            _LOGGER.warning("Feed %s answered HTTP %s", feed_url, resp.status)
+                            stats.record_error(f"Feed answered HTTP {resp.status}")
+                            return None
+                        if resp.status != 200:
+                            wait = retry_after(resp)
+                            raise aiohttp.ClientError(f"HTTP {resp.status}")
+                        # Without an earlier item to stop at, only the newest one is taken;
+                        # one item beyond the limit shows whether any were skipped
+                        items = await async_read_items(resp, seen, MAX_NEW_ITEMS + 1 if seen else 1, stats)
+                        stats.feed_latency = time.monotonic() - start
+                        feed_validators = response_validators(resp)
+                    breaker.record_success(feed_url)
+                except ET.ParseError as e:
+                    # The host answered; a broken feed is not a reason to back off
+                    breaker.record_success(feed_url)
+                    _LOGGER.warning("Failed to parse RSS feed: %s", e)
+                    stats.record_error(f"Failed to parse RSS feed: {e}")
+                    return None
+                except (aiohttp.ClientError, asyncio.TimeoutError, socket.gaierror) as err:
+                    self._record_failure(
+                        feed_url, breaker.record_failure(feed_url, wait), f"Failed to fetch feed: {err!r}"
+                    )
+                    return None
+            if not items:
+                if seen:
+                    _LOGGER.debug("No new items in feed %s", feed_url)
+                    self._validators[feed_url] = feed_validators
+                    return None
+                _LOGGER.warning("No items found in RSS feed")
+                stats.record_error("No items found in RSS feed")
+                return None
+
+            if len(items) > MAX_NEW_ITEMS:
+                _LOGGER.warning(
+                    "More than %s strips were published in %s since the last poll, skipping the older ones",
+                    MAX_NEW_ITEMS, feed_url,
+                )
+                del items[MAX_NEW_ITEMS:]
+            newest, older = items[0], items[1:]
+            if not newest.image_url:
+                _LOGGER.warning("No image URL found in latest feed item")
+                stats.record_error("No image URL found in latest feed item")
+                return None
+            if older:
+                _LOGGER.debug("%s strips published in %s since the last poll", len(items), feed_url)
+            for item in older:
+                self._record_publication(item.pub_date)
+            result, *_archived = await asyncio.gather(
+                self._async_fetch_image(newest, feed_validators, deadline),
+                *(self._async_archive_item(item, deadline) for item in older if item.image_url and self._archive),
+            )
+            return result
+        except asyncio.TimeoutError:
+            raise
+        except Exception as e:
+            _LOGGER.warning("Failed to download comic from %s: %s", feed_url, e)
+            stats.record_error(f"Failed to download comic: {e!r}")
+        return None
+
+    async def _async_fetch_image(
+        self, item: FeedItem, feed_validators: tuple[str | None, str | None], deadline: float
+    ) -> ComicResult | None:
+        """Make the newest item's image the current comic; the item is marked seen once it is on disk."""
+        stats = self.stats
+        validators = self._validators
+        img_url = item.image_url
+        # Stream the image to a temporary file next to the target
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout_at(deadline):
+                downloaded = await async_fetch_image(
+                    self.hass, img_url, os.path.dirname(self.image_path), conditional_headers(validators, img_url), stats
+                )
+        except HostCoolingDown as err:
+            self.failed_url = img_url
+            _LOGGER.debug("Skipping %s, %s", img_url, err)
+            return None
+        except ImageRejected as err:
+            # Asking again will not fix a missing or broken image: mark the item
+            # seen and wait for the next strip on the normal schedule
+            _LOGGER.warning("Rejected comic image %s, skipping this strip: %s", img_url, err)
+            stats.record_error(f"Rejected comic image: {err}")
+            validators[self.feed_url] = feed_validators
+            self._mark_seen([item])
+            return None
+        except HostFailed as err:
+            self._record_failure(img_url, err.cooldown, f"Failed to download image: {err}")
+            return None
+        stats.image_latency = time.monotonic() - start
+        if downloaded is None:
+            stats.not_modified += 1
+            _LOGGER.debug("Comic image not modified, keeping existing file: %s", img_url)
+            validators[self.feed_url] = feed_validators
+            self._mark_seen([item])
+            return None
+        # Publishing is local work that must not be left half done, whatever the deadline
+        return await asyncio.shield(self._async_publish(item, downloaded, feed_validators))
+
+    async def _async_publish(
+        self, item: FeedItem, downloaded: DownloadedImage, feed_validators: tuple[str | None, str | None]
+    ) -> ComicResult:
+        """Move a downloaded newest image into place, archive it and render its variants."""
+        stats = self.stats
+        validators = self._validators
+        img_url = item.image_url
+        image_hash = downloaded.sha256
+        image_cache = get_image_cache(self.hass, self.image_path)
+        if image_hash == image_cache.sha256:
+            _LOGGER.debug("Downloaded comic is identical to the current one, skipping write")
+            await self.hass.async_add_executor_job(os.remove, downloaded.path)
+            # The variants may still be those of an older comic if another
+            # fetcher wrote this file
+            await self._async_render_variants(image_hash)
+        else:
+            # Atomic rename, so readers never see a half-written file
+            start = time.monotonic()
+            mtime = await self.hass.async_add_executor_job(_replace_file, downloaded.path, self.image_path)
+            stats.write_time = (stats.write_time or 0) + time.monotonic() - start
+            # Drop the old bytes; the next image request loads the new file once
+            image_cache.expire(mtime, image_hash)
+            await self._async_archive(item, self.image_path, image_hash)
+            await self._async_render_variants(image_hash)
+        # Only remember validators and the seen item once the file is on disk,
+        # so a failed download is retried in full on the next poll
+        validators.clear()
+        validators[self.feed_url] = feed_validators
+        validators[img_url] = downloaded.validators
+        self._mark_seen([item])
+        _LOGGER.debug("Downloaded comic from feed %s: %s", self.feed_url, img_url)
+        return ComicResult(
+            image_path=self.image_path,
+            image_hash=image_hash,
+            image_size=downloaded.size,
+            content_type=downloaded.content_type,
+            pub_date=item.pub_date,
+            image_url=img_url,
+            updated_at=dt_util.utcnow().isoformat(),
+        )
+
+    async def _async_archive_item(self, item: FeedItem, deadline: float) -> None:
+        """Download a strip published between polls straight into the archive.
+
+        The item is marked seen on its own, so a newest image that keeps
+        failing does not download it again every poll. The feed is never read
+        past a seen item again, so a strip that could not be archived is kept
+        pending and tried again on the next poll.
+        """
+        slug = feed_slug(self.feed_url)
+        retry = True
+        try:
+            if not (item.guid and await self._archive.async_contains(slug, item.guid)):
+                await async_archive_image(
+                    self.hass, self._archive, slug, item, os.path.dirname(self.image_path), self.stats, deadline
+                )
+            retry = False
+        except (HostCoolingDown, asyncio.TimeoutError) as err:
+            _LOGGER.debug("Not archiving earlier comic %s yet: %r", item.image_url, err)
+        except ImageRejected as err:
+            _LOGGER.warning("Rejected comic image %s: %s", item.image_url, err)
+            retry = False
+        except HostFailed as err:
+            _LOGGER.warning("Failed to download earlier comic %s, trying again on the next poll: %s", item.image_url, err)
+        except (OSError, sqlite3.Error) as err:
+            _LOGGER.warning("Failed to archive comic %s, trying again on the next poll: %s", item.image_url, err)
+        self._set_pending(item, retry)
+        self._mark_seen([item])
@@ -0,0 +1,70 @@
+"""In-memory buffer of the comic image shared by the fetcher and image entities."""
+import hashlib
+import os
+from dataclasses import dataclass
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_IMAGE_CACHE
+
+
+@dataclass
+class CachedImage:
+    """Current bytes of one image file together with the file's mtime and SHA-256."""
+
+    data: bytes | None = None
+    mtime: float | None = None
+    sha256: str | None = None
+
+    def update(self, data: bytes, mtime: float, sha256: str) -> bool:
+        """Store data unless the buffer already holds a newer version of the file."""
+        if self.mtime is not None and mtime < self.mtime:
+            return False
+        self.data = data
+        self.mtime = mtime
+        self.sha256 = sha256
+        return True
+
+    def expire(self, mtime: float, sha256: str) -> None:
+        """Record that the file was replaced; its bytes are loaded on the next request."""
+        self.data = None
+        self.mtime = mtime
+        self.sha256 = sha256
+
+
+def get_image_cache(hass: HomeAssistant, path: str) -> CachedImage:
+    """Return the shared buffer for an image file, creating an empty one if needed."""
+    caches = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_IMAGE_CACHE, {})
+    return caches.setdefault(path, CachedImage())
+
+
+# Leading bytes of the formats darkball and the variant renderer produce
+_MAGIC = (
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+def sniff_content_type(data: bytes) -> str | None:
+    """Return the image MIME type from the file's magic bytes, None if unknown."""
+    for magic, content_type in _MAGIC:
+        if data.startswith(magic):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hex SHA-256 digest used to tell comics apart."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_image_file(path: str) -> tuple[bytes, float, str]:
+    """Read an image file with its mtime and content hash. Blocking, run on the executor."""
+    with open(path, "rb") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        data = f.read()
+    return data, mtime, content_hash(data)
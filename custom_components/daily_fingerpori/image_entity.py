@@ -3,21 +3,31 @@ import uuid
 import os
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.components.image import ImageEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.util import dt as dt_util
 from datetime import datetime
-from .const import DOMAIN, DEFAULT_NAME
+from email.utils import parsedate_to_datetime
+from .const import DOMAIN, DEFAULT_NAME, FEED_URL, DATA_IMAGE_ENTITIES, IMAGE_VIEW_URL
+from .fetch import feed_slug
+from .fetcher import ComicResult
+from .image_cache import get_image_cache, read_image_file, sniff_content_type
+from .profiler import get_profiler
+from .variants import VARIANTS, variant_path
 
 _LOGGER = logging.getLogger(__name__)
 
 class FingerporiImage(CoordinatorEntity, ImageEntity):
-    def __init__(self, hass: HomeAssistant, coordinator, path: str, config_entry_id: str | None = None, name: str | None = None):
+    def __init__(self, hass: HomeAssistant, coordinator, path: str, config_entry_id: str | None = None, name: str | None = None, feed_url: str | None = None):
         # Initialize CoordinatorEntity so the entity receives coordinator updates
         super().__init__(coordinator)
         self.hass = hass
         self.coordinator = coordinator
         self._path = path
+        # In-memory copy of the image file, shared with the fetcher writing it
+        self._image_cache = get_image_cache(hass, path)
         self._config_entry_id = config_entry_id
+        # Feed this entity shows when the coordinator serves several feeds (None for legacy setup)
+        self._feed_url = feed_url
         # do not set a fixed entity_id — let HA assign one based on name/unique_id
 
         # minimal access token support required by the image component
@@ -29,6 +39,9 @@ class FingerporiImage(CoordinatorEntity, ImageEntity):
         # This makes Home Assistant reuse the same registry entry and link it to the integration
         if config_entry_id:
             self._unique_id = f"{DOMAIN}_{config_entry_id}"
+            # Fingerpori keeps its original id; other strips are told apart by feed
+            if feed_url and feed_url != FEED_URL:
+                self._unique_id = f"{self._unique_id}_{feed_slug(feed_url)}"
         else:
             # fallback unique id based on filename path
             self._unique_id = f"{DOMAIN}_{os.path.basename(self._path)}"
@@ -38,16 +51,21 @@ class FingerporiImage(CoordinatorEntity, ImageEntity):
         self._last_refreshed: datetime | None = None
         # Publication date of the comic (datetime object from RSS feed)
         self._pub_date: datetime | None = None
+        # SHA-256 of the image currently served; only a new hash rotates the access token
+        self._image_hash: str | None = None
 
     async def async_added_to_hass(self) -> None:
         """Register a listener to rotate the access token when coordinator updates."""
         # coordinator.async_add_listener returns an unsubscribe callable
         self._remove_coordinator_listener = self.coordinator.async_add_listener(self._on_coordinator_update)
+        # Let view.FingerporiImageView find this entity
+        self.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_IMAGE_ENTITIES, {})[self.entity_id] = self
 
         # Initialize last_refreshed only if coordinator already has data (first successful refresh)
-        # Coordinator.update_method returns dict with image_data and pub_date when a new image was fetched
-        # and returns None when nothing changed; use this to avoid updating the timestamp on empty refreshes.
-        if getattr(self.coordinator, "data", None) is not None:
+        # Fetchers return a fetcher.ComicResult when a new image was fetched and None when
+        # nothing changed; use this to avoid updating the timestamp on empty refreshes.
+        data = self._coordinator_result()
+        if data is not None:
             # Prefer coordinator-provided timestamps if available, otherwise use now
             coordinator_time = None
             for attr in ("last_update_time", "last_update_at", "last_update", "_last_update", "_last_update_time", "_last_update_at"):
@@ -55,42 +73,61 @@ class FingerporiImage(CoordinatorEntity, ImageEntity):
                 if isinstance(coordinator_time, datetime):
                     break
             self._last_refreshed = coordinator_time or dt_util.utcnow()
+            # Comics restored on startup keep the time they were downloaded
+            if data.updated_at:
+                self._last_refreshed = dt_util.parse_datetime(data.updated_at) or self._last_refreshed
+            self._image_hash = data.image_hash
+            self._attr_image_last_updated = self._last_refreshed
             # Extract and parse publication date from coordinator data
-            if isinstance(self.coordinator.data, dict):
-                pub_date_str = self.coordinator.data.get("pub_date")
-                if pub_date_str:
-                    try:
-                        from email.utils import parsedate_to_datetime
-                        self._pub_date = parsedate_to_datetime(pub_date_str)
-                    except Exception as e:
-                        _LOGGER.debug("Failed to parse publication date '%s': %s", pub_date_str, e)
+            self._set_pub_date(data.pub_date)
         else:
             self._last_refreshed = None
 
+    def _coordinator_result(self) -> ComicResult | None:
+        """Return this entity's part of the coordinator data.
+
+        The config entry coordinator maps each feed URL to its result; the legacy
+        platform coordinator returns the result directly.
+        """
+        data = getattr(self.coordinator, "data", None)
+        if self._feed_url is not None and isinstance(data, dict):
+            return data.get(self._feed_url)
+        return data
+
     async def async_will_remove_from_hass(self) -> None:
         if hasattr(self, "_remove_coordinator_listener") and callable(self._remove_coordinator_listener):
             self._remove_coordinator_listener()
+        self.hass.data.get(DOMAIN, {}).get(DATA_IMAGE_ENTITIES, {}).pop(self.entity_id, None)
 
     def _on_coordinator_update(self) -> None:
-        """Rotate access token and write state so the frontend reloads the image."""
+        """Rotate access token and write state so the frontend reloads the image.
+
+        Refreshes that return None or the same image hash leave the token and state
+        untouched, so clients keep using their cached copy of the comic.
+        """
+        data = self._coordinator_result()
+        if data is None:
+            return
+        if data.image_hash == self._image_hash:
+            _LOGGER.debug("Comic unchanged (%s), keeping access token", data.image_hash)
+            return
         self._access_token = uuid.uuid4().hex
         self._access_tokens = [self._access_token]
-        # Update last refreshed timestamp only when coordinator has non-None data
-        # (update_image returns dict when a new image was actually downloaded)
-        if getattr(self.coordinator, "data", None) is not None:
-            self._last_refreshed = dt_util.utcnow()
-            # Extract and parse publication date from coordinator data
-            if isinstance(self.coordinator.data, dict):
-                pub_date_str = self.coordinator.data.get("pub_date")
-                if pub_date_str:
-                    try:
-                        from email.utils import parsedate_to_datetime
-                        self._pub_date = parsedate_to_datetime(pub_date_str)
-                    except Exception as e:
-                        _LOGGER.debug("Failed to parse publication date '%s': %s", pub_date_str, e)
+        self._image_hash = data.image_hash
+        self._last_refreshed = dt_util.utcnow()
+        self._attr_image_last_updated = self._last_refreshed
+        # Extract and parse publication date from coordinator data
+        self._set_pub_date(data.pub_date)
         # Trigger HA state update so frontend will use the new token/url
         self.async_write_ha_state()
 
+    def _set_pub_date(self, pub_date_str: str | None) -> None:
+        if pub_date_str:
+            try:
+                self._pub_date = parsedate_to_datetime(pub_date_str)
+            except Exception as e:
+                _LOGGER.debug("Failed to parse publication date '%s': %s", pub_date_str, e)
+
     @property
     def extra_state_attributes(self) -> dict:
         """Return additional state attributes for the entity."""
@@ -100,6 +137,10 @@ class FingerporiImage(CoordinatorEntity, ImageEntity):
                 attrs["last_updated"] = dt_util.as_utc(self._last_refreshed).isoformat()
             except Exception:
                 attrs["last_updated"] = str(self._last_refreshed)
+        if self._attr_image_last_updated:
+            attrs["image_last_updated"] = dt_util.as_utc(self._attr_image_last_updated).isoformat()
+        if self._image_hash:
+            attrs["image_hash"] = self._image_hash
         return attrs
 
     @property
@@ -111,19 +152,51 @@ class FingerporiImage(CoordinatorEntity, ImageEntity):
         """
         return self._pub_date
 
-    def _read_file(self) -> bytes:
-        with open(self._path, "rb") as f:
-            return f.read()
-
     async def async_image(self) -> bytes | None:
-        """Return image bytes. Read file on executor to avoid blocking the event loop."""
-        try:
-            return await self.hass.async_add_executor_job(self._read_file)
-        except FileNotFoundError:
-            return None
-        except Exception:
-            _LOGGER.exception("Failed to read fingerpori image file")
+        """Return image bytes from the shared in-memory buffer.
+
+        Only a cold buffer (e.g. right after a restart) reads the file, on the executor.
+        """
+        with get_profiler(self.hass).track("image"):
+            return await self._async_image()
+
+    async def _async_image(self) -> bytes | None:
+        data = self._image_cache.data
+        if data is None:
+            try:
+                data, mtime, image_hash = await self.hass.async_add_executor_job(read_image_file, self._path)
+                self._image_cache.update(data, mtime, image_hash)
+                data = self._image_cache.data
+            except FileNotFoundError:
+                return None
+            except Exception:
+                _LOGGER.exception("Failed to read fingerpori image file")
+                return None
+        # The file may be a GIF, PNG or JPEG whatever the feed called it
+        content_type = sniff_content_type(data)
+        if content_type and content_type != self._attr_content_type:
+            self._attr_content_type = content_type
+        return data
+
+    @property
+    def image_etag(self) -> str | None:
+        """Return a strong ETag for the bytes currently served, None before they are known."""
+        if self._image_cache.sha256 is None:
             return None
+        return f'"{self._image_cache.sha256}"'
+
+    @property
+    def entity_picture(self) -> str:
+        """Link to view.FingerporiImageView, so browsers can revalidate with the ETag."""
+        return IMAGE_VIEW_URL.format(self.entity_id, self._access_token)
+
+    @callback
+    def async_update_token(self) -> None:
+        """Keep the token until the comic changes.
+
+        The image component rotates tokens every few minutes, which would
+        change the picture URL and defeat the client's cached copy.
+        """
 
     @property
     def access_tokens(self) -> list[str]:
@@ -155,4 +228,17 @@ class FingerporiImage(CoordinatorEntity, ImageEntity):
     @property
     def device_class(self):
         """Return device class 'timestamp' for datetime formatting with localization."""
-        return "timestamp"
\ No newline at end of file
+        return "timestamp"
+
+
+class FingerporiVariantImage(FingerporiImage):
+    """A pre-rendered variant (e.g. small WebP or grayscale PNG) of a strip's comic.
+
+    The coordinator renders the file whenever the comic changes, so the entity
+    follows the same hash/token logic as the original image.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, path: str, config_entry_id: str | None, name: str, feed_url: str | None, variant: str):
+        super().__init__(hass, coordinator, variant_path(path, variant), config_entry_id, f"{name} ({variant})", feed_url)
+        self._unique_id = f"{self._unique_id}_{variant}"
+        self._attr_content_type = VARIANTS[variant].content_type
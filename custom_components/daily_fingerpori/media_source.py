@@ -0,0 +1,106 @@
+"""Media source for browsing archived comics."""
+from homeassistant.components.media_player import MediaClass
+from homeassistant.components.media_source.error import Unresolvable
+from homeassistant.components.media_source.models import (
+    BrowseMediaSource,
+    MediaSource,
+    MediaSourceItem,
+    PlayMedia,
+)
+from homeassistant.core import HomeAssistant
+
+from .archive import ArchivedComic, ComicArchive
+from .const import DOMAIN, DEFAULT_NAME, DATA_ARCHIVE, ARCHIVE_DIR, ARCHIVE_BROWSE_LIMIT
+
+_MIME_TYPES = {".gif": "image/gif", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+
+async def async_get_media_source(hass: HomeAssistant) -> "ComicMediaSource":
+    return ComicMediaSource(hass)
+
+
+def _mime_type(filename: str) -> str:
+    return _MIME_TYPES.get(filename[filename.rfind("."):].lower(), "image/gif")
+
+
+def _archive_url(comic: ArchivedComic) -> str:
+    return f"/local/{ARCHIVE_DIR}/{comic.filename}"
+
+
+class ComicMediaSource(MediaSource):
+    """Lists the newest archived comics of each strip.
+
+    Identifiers are "<strip>" for a strip folder and "<strip>/<sha256>" for a comic.
+    """
+
+    name = DEFAULT_NAME
+
+    def __init__(self, hass: HomeAssistant):
+        super().__init__(DOMAIN)
+        self.hass = hass
+
+    def _archive(self) -> ComicArchive:
+        archive = self.hass.data.get(DOMAIN, {}).get(DATA_ARCHIVE)
+        if archive is None:
+            raise Unresolvable("Comic archive is not set up")
+        return archive
+
+    async def async_resolve_media(self, item: MediaSourceItem) -> PlayMedia:
+        _feed, _, sha256 = (item.identifier or "").partition("/")
+        comic = await self._archive().async_lookup(sha256) if sha256 else None
+        if comic is None:
+            raise Unresolvable(f"Unknown comic: {item.identifier}")
+        return PlayMedia(_archive_url(comic), _mime_type(comic.filename))
+
+    async def async_browse_media(self, item: MediaSourceItem) -> BrowseMediaSource:
+        archive = self._archive()
+        if not item.identifier:
+            feeds = await archive.async_feeds()
+            return BrowseMediaSource(
+                domain=DOMAIN,
+                identifier=None,
+                media_class=MediaClass.DIRECTORY,
+                media_content_type="",
+                title=DEFAULT_NAME,
+                can_play=False,
+                can_expand=True,
+                children_media_class=MediaClass.DIRECTORY,
+                children=[
+                    BrowseMediaSource(
+                        domain=DOMAIN,
+                        identifier=feed,
+                        media_class=MediaClass.DIRECTORY,
+                        media_content_type="",
+                        title=feed.replace("_", " ").title(),
+                        can_play=False,
+                        can_expand=True,
+                    )
+                    for feed in feeds
+                ],
+            )
+
+        feed = item.identifier.partition("/")[0]
+        comics = await archive.async_recent(feed, ARCHIVE_BROWSE_LIMIT)
+        return BrowseMediaSource(
+            domain=DOMAIN,
+            identifier=feed,
+            media_class=MediaClass.DIRECTORY,
+            media_content_type="",
+            title=feed.replace("_", " ").title(),
+            can_play=False,
+            can_expand=True,
+            children_media_class=MediaClass.IMAGE,
+            children=[
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"{feed}/{comic.sha256}",
+                    media_class=MediaClass.IMAGE,
+                    media_content_type=_mime_type(comic.filename),
+                    title=comic.pub_date or comic.item_key,
+                    can_play=True,
+                    can_expand=False,
+                    thumbnail=_archive_url(comic),
+                )
+                for comic in comics
+            ],
+        )
@@ -0,0 +1,159 @@
+"""On-demand cProfile and tracemalloc capture of refresh cycles and image requests."""
+import cProfile
+import logging
+import os
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, DATA_PROFILER, SERVICE_PROFILE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Stack depth recorded per allocation, so allocations made by aiohttp or Pillow
+# on behalf of this integration are still traced back to it
+TRACEMALLOC_FRAMES = 25
+
+ATTR_REFRESH_CYCLES = "refresh_cycles"
+ATTR_IMAGE_REQUESTS = "image_requests"
+ATTR_MAX_DURATION = "max_duration"
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_REFRESH_CYCLES, default=3): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+        vol.Optional(ATTR_IMAGE_REQUESTS, default=20): vol.All(vol.Coerce(int), vol.Range(min=0, max=10000)),
+        vol.Optional(ATTR_MAX_DURATION, default=30): vol.All(vol.Coerce(int), vol.Range(min=1, max=24 * 60)),
+    }
+)
+
+
+def _write_results(profile: cProfile.Profile, prof_path: str, snapshot_path: str, started_tracing: bool) -> None:
+    """Dump the profile and a tracemalloc snapshot of this integration. Blocking, run on the executor."""
+    profile.dump_stats(prof_path)
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(True, os.path.join(os.path.dirname(__file__), "*"), all_frames=True)]
+    )
+    if started_tracing:
+        tracemalloc.stop()
+    snapshot.dump(snapshot_path)
+    for stat in snapshot.statistics("lineno")[:10]:
+        _LOGGER.info("Allocated while profiling: %s", stat)
+
+
+class Profiler:
+    """Profiles the next refresh cycles and image requests when armed by the service.
+
+    While any tracked call runs, the session's cProfile.Profile is enabled. It
+    records everything on the event loop thread during that time, which
+    includes other integrations' callbacks but not executor jobs. tracemalloc
+    runs from arming until the results are written. The session ends once
+    the requested number of calls has been seen or max_duration has passed.
+    Calls still running when a session times out keep their count against the
+    profile they started with, so they never disable the next session's.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+        self._remaining: dict[str, int] = {}
+        self._profile: cProfile.Profile | None = None
+        # Tracked calls running per profile
+        self._active: dict[cProfile.Profile, int] = {}
+        self._started_tracing = False
+        self._cancel_timeout = None
+
+    @property
+    def armed(self) -> bool:
+        return self._profile is not None
+
+    @callback
+    def async_arm(self, refresh_cycles: int, image_requests: int, max_duration: timedelta) -> None:
+        self._remaining = {"refresh": refresh_cycles, "image": image_requests}
+        self._profile = cProfile.Profile()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._cancel_timeout = async_call_later(self.hass, max_duration, self._async_timed_out)
+        _LOGGER.info(
+            "Profiling the next %s refresh cycles and %s image requests (at most %s)",
+            refresh_cycles, image_requests, max_duration,
+        )
+
+    @contextmanager
+    def track(self, kind: str) -> Iterator[None]:
+        """Profile the enclosed code if a session still wants calls of this kind."""
+        if self._profile is None or self._remaining.get(kind, 0) <= 0:
+            yield
+            return
+        self._remaining[kind] -= 1
+        profile = self._profile
+        if not self._active.get(profile):
+            profile.enable()
+        self._active[profile] = self._active.get(profile, 0) + 1
+        try:
+            yield
+        finally:
+            self._active[profile] -= 1
+            if not self._active[profile]:
+                del self._active[profile]
+                # A session that timed out has already disabled its profile,
+                # and disabling it again would stop the next session's
+                if profile is self._profile:
+                    profile.disable()
+                    if not any(self._remaining.values()):
+                        self._async_finish()
+
+    @callback
+    def _async_timed_out(self, _now) -> None:
+        self._cancel_timeout = None
+        if self._profile is not None:
+            _LOGGER.info("Profiling time limit reached with %s calls still wanted", self._remaining)
+            if self._profile in self._active:
+                self._profile.disable()
+            self._async_finish()
+
+    @callback
+    def _async_finish(self) -> None:
+        profile, self._profile = self._profile, None
+        if self._cancel_timeout is not None:
+            self._cancel_timeout()
+            self._cancel_timeout = None
+        base = self.hass.config.path(f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}")
+        self.hass.async_add_executor_job(
+            _write_results, profile, f"{base}.prof", f"{base}.tracemalloc", self._started_tracing
+        )
+        _LOGGER.info("Writing profile to %s.prof and allocations to %s.tracemalloc", base, base)
+
+
+def get_profiler(hass: HomeAssistant) -> Profiler:
+    """Return the profiler shared by all config entries and the legacy platform."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PROFILER not in domain_data:
+        domain_data[DATA_PROFILER] = Profiler(hass)
+    return domain_data[DATA_PROFILER]
+
+
+@callback
+def async_register_profile_service(hass: HomeAssistant) -> None:
+    """Register the profile service."""
+
+    async def async_handle_profile(call: ServiceCall) -> None:
+        profiler = get_profiler(hass)
+        if profiler.armed:
+            raise HomeAssistantError("Profiling is already running")
+        if not call.data[ATTR_REFRESH_CYCLES] and not call.data[ATTR_IMAGE_REQUESTS]:
+            raise HomeAssistantError("Nothing to profile")
+        profiler.async_arm(
+            call.data[ATTR_REFRESH_CYCLES],
+            call.data[ATTR_IMAGE_REQUESTS],
+            timedelta(minutes=call.data[ATTR_MAX_DURATION]),
+        )
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_handle_profile, schema=PROFILE_SCHEMA)
@@ -0,0 +1,76 @@
+"""Adaptive polling: learn when strips are published and poll around that time."""
+import math
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+# Shortest delay between polls while a new strip is expected
+MIN_POLL_INTERVAL = timedelta(minutes=10)
+# Observed publication times kept per feed
+HISTORY_SIZE = 30
+# Observations needed before the window is trusted over the fixed interval
+MIN_OBSERVATIONS = 3
+# Slack added on both sides of the learned window
+WINDOW_MARGIN = timedelta(minutes=20)
+
+_MINUTES_PER_DAY = 24 * 60
+
+
+def parse_pub_date(pub_date: str | None) -> datetime | None:
+    """Parse an RSS pubDate into an aware UTC datetime."""
+    if not pub_date:
+        return None
+    try:
+        parsed = parsedate_to_datetime(pub_date)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def publication_window(pub_times: list[datetime]) -> tuple[float, float] | None:
+    """Return (center, half width) in UTC minutes of day when strips usually appear.
+
+    Times of day are averaged on a circle so a window around midnight works.
+    The half width covers every observation except the farthest tenth. None
+    until there are MIN_OBSERVATIONS observations.
+    """
+    if len(pub_times) < MIN_OBSERVATIONS:
+        return None
+    angles = [2 * math.pi * (t.hour * 60 + t.minute) / _MINUTES_PER_DAY for t in pub_times]
+    center_angle = math.atan2(sum(map(math.sin, angles)), sum(map(math.cos, angles)))
+    center = (center_angle * _MINUTES_PER_DAY / (2 * math.pi)) % _MINUTES_PER_DAY
+
+    def _distance(angle: float) -> float:
+        diff = abs(angle - center_angle) % (2 * math.pi)
+        return min(diff, 2 * math.pi - diff) * _MINUTES_PER_DAY / (2 * math.pi)
+
+    deviations = sorted(_distance(a) for a in angles)
+    spread = deviations[max(0, math.ceil(len(deviations) * 0.9) - 1)]
+    return center, spread + WINDOW_MARGIN.total_seconds() / 60
+
+
+def next_poll_delay(now: datetime, pub_times: list[datetime], max_interval: timedelta) -> timedelta:
+    """Return how long to wait before polling a feed again.
+
+    Inside the publication window, until today's strip has been seen, poll every
+    MIN_POLL_INTERVAL. Otherwise wait for the next window to open. The configured
+    interval stays the upper bound, and is used as is until a window is learned.
+    """
+    window = publication_window(pub_times)
+    if window is None:
+        return max_interval
+    center, half_width = window
+    latest = max(pub_times)
+    midnight = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    delay = max_interval
+    for day in (-1, 0, 1, 2):
+        window_center = midnight + timedelta(days=day, minutes=center)
+        start = window_center - timedelta(minutes=half_width)
+        end = window_center + timedelta(minutes=half_width)
+        if end < now or latest >= start:
+            # Window is over, or its strip has already been seen
+            continue
+        delay = MIN_POLL_INTERVAL if start <= now else start - now
+        break
+    return max(MIN_POLL_INTERVAL, min(delay, max_interval))
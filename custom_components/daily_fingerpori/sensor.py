@@ -0,0 +1,179 @@
+"""Diagnostic sensors exposing the fetch pipeline instrumentation."""
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .backfill import BACKFILL_STATES, Backfill, signal_backfill
+from .const import DOMAIN, DEFAULT_NAME
+from .fetch import feed_display_name, feed_slug
+from .stats import FetchStats
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+@dataclass(frozen=True, kw_only=True)
+class FetchStatsSensorDescription(SensorEntityDescription):
+    """Describes one value taken from a feed's FetchStats."""
+
+    value_fn: Callable[[FetchStats], float | int | str | None]
+
+
+SENSORS = (
+    FetchStatsSensorDescription(
+        key="feed_latency",
+        name="Feed latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _ms(stats.feed_latency),
+    ),
+    FetchStatsSensorDescription(
+        key="image_latency",
+        name="Image latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _ms(stats.image_latency),
+    ),
+    FetchStatsSensorDescription(
+        key="parse_time",
+        name="Parse time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _ms(stats.parse_time),
+    ),
+    FetchStatsSensorDescription(
+        key="write_time",
+        name="Write time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda stats: _ms(stats.write_time),
+    ),
+    FetchStatsSensorDescription(
+        key="bytes_downloaded",
+        name="Bytes downloaded",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.bytes_downloaded,
+    ),
+    FetchStatsSensorDescription(
+        key="retries",
+        name="Retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.retries,
+    ),
+    FetchStatsSensorDescription(
+        key="not_modified",
+        name="Not modified responses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.not_modified,
+    ),
+    FetchStatsSensorDescription(
+        key="last_error",
+        name="Last error",
+        value_fn=lambda stats: stats.last_error[:255] if stats.last_error else None,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up diagnostic sensors for every feed of a config entry, and its backfill sensor."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    entities: list[SensorEntity] = [
+        FingerporiStatsSensor(coordinator, entry, feed_url, description)
+        for feed_url in coordinator.feeds
+        for description in SENSORS
+    ]
+    entities.append(FingerporiBackfillSensor(hass.data[DOMAIN][entry.entry_id]["backfill"], entry))
+    async_add_entities(entities)
+
+
+class FingerporiStatsSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor for one fetch pipeline metric of one feed."""
+
+    entity_description: FetchStatsSensorDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, entry: ConfigEntry, feed_url: str, description: FetchStatsSensorDescription):
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._entry = entry
+        self._feed_url = feed_url
+        self._attr_name = f"{feed_display_name(entry.title or DEFAULT_NAME, feed_url)} {description.name}"
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_{feed_slug(feed_url)}_{description.key}"
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator.stats[self._feed_url])
+
+    @property
+    def device_info(self):
+        """Return device information to group with the image entity."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+            "name": self._entry.title or DEFAULT_NAME,
+            "manufacturer": "Fingerpori",
+            "model": "Daily Comic",
+        }
+
+
+class FingerporiBackfillSensor(SensorEntity):
+    """Status of the entry's backfill run, with its counters as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_options = BACKFILL_STATES
+    _attr_icon = "mdi:archive-arrow-down"
+    _attr_should_poll = False
+
+    def __init__(self, backfill: Backfill, entry: ConfigEntry):
+        self._backfill = backfill
+        self._entry = entry
+        self._attr_name = f"{entry.title or DEFAULT_NAME} Backfill"
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_backfill"
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, signal_backfill(self._entry.entry_id), self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self) -> str:
+        return self._backfill.progress.status
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        attrs = self._backfill.progress.as_dict()
+        del attrs["status"]
+        return attrs
+
+    @property
+    def device_info(self):
+        """Return device information to group with the image entity."""
+        return {
+            "identifiers": {(DOMAIN, self._entry.entry_id)},
+            "name": self._entry.title or DEFAULT_NAME,
+            "manufacturer": "Fingerpori",
+            "model": "Daily Comic",
+        }
@@ -0,0 +1,41 @@
+"""Instrumentation of the fetch pipeline, exposed as diagnostic sensors and diagnostics."""
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from homeassistant.util import dt as dt_util
+
+
+@dataclass
+class FetchStats:
+    """Timings and counters of one feed's fetch pipeline.
+
+    Timings (seconds) describe the most recent refresh that got that far;
+    counters are running totals since Home Assistant started.
+    """
+
+    feed_latency: float | None = None
+    image_latency: float | None = None
+    parse_time: float | None = None
+    write_time: float | None = None
+    last_bytes: int = 0
+    bytes_downloaded: int = 0
+    retries: int = 0
+    short_circuits: int = 0
+    not_modified: int = 0
+    refreshes: int = 0
+    last_error: str | None = None
+    last_error_at: datetime | None = None
+
+    def add_bytes(self, count: int) -> None:
+        self.last_bytes += count
+        self.bytes_downloaded += count
+
+    def record_error(self, message: str) -> None:
+        self.last_error = message
+        self.last_error_at = dt_util.utcnow()
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        if self.last_error_at:
+            data["last_error_at"] = self.last_error_at.isoformat()
+        return data
@@ -0,0 +1,85 @@
+"""Pre-rendered size and format variants of the comic for small or e-ink screens."""
+import logging
+import os
+from dataclasses import dataclass
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    """How one variant is rendered from the original comic."""
+
+    max_width: int
+    image_format: str
+    content_type: str
+    ext: str
+    grayscale: bool = False
+
+
+VARIANTS = {
+    # Resized WebP for phone widgets and small wall tablets
+    "small": VariantSpec(max_width=480, image_format="WEBP", content_type="image/webp", ext=".webp"),
+    # Low-resolution grayscale PNG for e-ink panels
+    "grayscale": VariantSpec(max_width=800, image_format="PNG", content_type="image/png", ext=".png", grayscale=True),
+}
+
+
+def variant_path(image_path: str, name: str) -> str:
+    """Return where a variant of image_path is cached, e.g. www/fingerpori_latest.small.webp."""
+    base, _ext = os.path.splitext(image_path)
+    return f"{base}.{name}{VARIANTS[name].ext}"
+
+
+def _source_path(path: str) -> str:
+    """Return the sidecar file holding the SHA-256 of the original a variant was rendered from."""
+    return f"{path}.source"
+
+
+def _rendered_from(path: str) -> str | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(_source_path(path), encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def render_variants(image_path: str, names: list[str], source_hash: str) -> dict[str, float]:
+    """Render the named variants of image_path that are stale and return their mtimes.
+
+    Blocking, run on the executor whenever a comic is downloaded. Variants
+    already rendered from source_hash are kept, so downloading the same comic
+    again costs nothing; the original may also have been replaced by another
+    fetcher (the legacy platform, or another entry without variants), which
+    leaves older variants behind. Pillow ships with Home Assistant; without
+    it no variants are rendered.
+    """
+    names = [name for name in names if _rendered_from(variant_path(image_path, name)) != source_hash]
+    if not names:
+        return {}
+    try:
+        from PIL import Image
+    except ImportError:
+        _LOGGER.warning("Pillow is not available, comic variants are not rendered")
+        return {}
+
+    mtimes = {}
+    with Image.open(image_path) as original:
+        # Animated GIFs are reduced to their first frame
+        original.seek(0)
+        for name in names:
+            spec = VARIANTS[name]
+            img = original.convert("L" if spec.grayscale else "RGB")
+            if img.width > spec.max_width:
+                height = round(img.height * spec.max_width / img.width)
+                img = img.resize((spec.max_width, height), Image.Resampling.LANCZOS)
+            path = variant_path(image_path, name)
+            tmp_path = f"{path}.tmp"
+            img.save(tmp_path, format=spec.image_format, optimize=True)
+            os.replace(tmp_path, path)
+            with open(_source_path(path), "w", encoding="ascii") as f:
+                f.write(source_hash)
+            mtimes[name] = os.stat(path).st_mtime
+    return mtimes
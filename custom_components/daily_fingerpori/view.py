@@ -0,0 +1,60 @@
+"""HTTP view serving comic images with cache validators."""
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import KEY_AUTHENTICATED, HomeAssistantView
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, DATA_IMAGE_ENTITIES
+
+# Clients may keep the image but must revalidate it; an unchanged comic costs a 304
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class FingerporiImageView(HomeAssistantView):
+    """Serve a comic image entity like the core image proxy, plus ETag and 304.
+
+    The ETag is the SHA-256 of the served bytes, so it is strong and changes
+    exactly when the comic does. Access is checked the same way as by the
+    core view: a logged-in user or one of the entity's access tokens.
+    """
+
+    name = "api:daily_fingerpori:image"
+    requires_auth = False
+    url = "/api/daily_fingerpori/image/{entity_id}"
+
+    def __init__(self, hass: HomeAssistant):
+        self.hass = hass
+
+    async def get(self, request: web.Request, entity_id: str) -> web.StreamResponse:
+        entity = self.hass.data.get(DOMAIN, {}).get(DATA_IMAGE_ENTITIES, {}).get(entity_id)
+        if entity is None:
+            raise web.HTTPNotFound()
+
+        authenticated = request[KEY_AUTHENTICATED] or request.query.get("token") in entity.access_tokens
+        if not authenticated:
+            if hdrs.AUTHORIZATION in request.headers:
+                raise web.HTTPUnauthorized()
+            raise web.HTTPForbidden()
+
+        if_none_match = request.headers.get(hdrs.IF_NONE_MATCH)
+        headers = {hdrs.CACHE_CONTROL: CACHE_CONTROL}
+        # A warm cache knows the hash without touching the bytes
+        etag = entity.image_etag
+        if etag is None or not _etag_matches(if_none_match, etag):
+            data = await entity.async_image()
+            if data is None:
+                raise web.HTTPNotFound()
+            etag = entity.image_etag
+            if etag is not None:
+                headers[hdrs.ETAG] = etag
+            if etag is None or not _etag_matches(if_none_match, etag):
+                return web.Response(body=data, content_type=entity.content_type, headers=headers)
+        headers[hdrs.ETAG] = etag
+        return web.Response(status=304, headers=headers)